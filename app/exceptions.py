@@ -11,6 +11,7 @@ from starlette.status import (
     HTTP_422_UNPROCESSABLE_ENTITY,
     HTTP_429_TOO_MANY_REQUESTS,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 
@@ -50,6 +51,8 @@ class ErrorCode:
     TOO_MANY_REQUESTS = 'TOO_MANY_REQUESTS'  # 请求太频繁
     IP_BANNED_ERROR = 'IP_BANNED_ERROR'  # ip封锁
 
+    SERVER_BUSY_ERROR = 'SERVER_BUSY_ERROR'  # 服务繁忙
+
     @classmethod
     def get_error_code_list(cls):
         return [key for key in cls.__dict__.keys() if not key.startswith('__') and not callable(getattr(cls, key))]
@@ -99,6 +102,11 @@ class AuthenticationError(HTTPException):
     """未认证"""
 
 
+@exception_decorator(HTTP_403_FORBIDDEN, ErrorCode.AUTHORIZATION_ERROR)
+class AuthorizationError(HTTPException):
+    """未授权"""
+
+
 @exception_decorator(HTTP_400_BAD_REQUEST, ErrorCode.INVALID_CSRF_ERROR)
 class InvalidCSRFError(HTTPException):
     """非法 CSRF"""
@@ -177,3 +185,8 @@ class TooManyRequestsError(HTTPException):
 @exception_decorator(HTTP_403_FORBIDDEN, ErrorCode.IP_BANNED_ERROR)
 class IPBannedError(HTTPException):
     """IP 已被封禁"""
+
+
+@exception_decorator(HTTP_503_SERVICE_UNAVAILABLE, ErrorCode.SERVER_BUSY_ERROR)
+class ServerBusyError(HTTPException):
+    """服务繁忙"""
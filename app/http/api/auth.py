@@ -11,18 +11,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.exceptions import InvalidCellphoneError
 from app.http.deps import auth_deps, database_deps, request_deps
 from app.schemas.common import BoolSc
-from app.schemas.oauth2 import OAuth2CellphoneSc
-from app.schemas.token import TokenSc, TokenStatusSc
+from app.schemas.oauth2 import OAuth2CellphoneSc, OAuth2RefreshTokenSc
+from app.schemas.token import TokenIntrospectReqSc, TokenIntrospectRespSc, TokenSc, TokenStatusSc
 from app.services.auth import verification_code_service
-from app.services.auth.grant_service import CellphoneGrant, PasswordGrant
-from app.services.auth.token_service import cancel_token, validate_token
+from app.services.auth.grant_service import CellphoneGrant, PasswordGrant, RefreshTokenGrant
+from app.services.auth.token_service import cancel_token, introspect_tokens, revoke_refresh_token, validate_token
 from app.services.sms import sms_sender
+from app.support.query_stats_helper import query_budget
 from app.support.string_helper import is_chinese_cellphone
 
 router = APIRouter(prefix='/auth', tags=['认证与授权'])
 
 
 @router.post('/token/password', response_model=TokenSc, name='用户名+密码登录')
+@query_budget(max_queries=4)  # 查询用户、设置时区，密码需要重新哈希时更新用户
 async def login_with_password(
     request_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     client_ip: Annotated[str, Depends(request_deps.get_request_ip)],
@@ -30,6 +32,8 @@ async def login_with_password(
 ):
     grant = PasswordGrant(session, client_ip, request_data)
     token_data = await grant.respond()
+    if grant.is_password_rehashed:
+        await session.commit()
     return token_data
 
 
@@ -46,18 +50,39 @@ async def login_with_cellphone(
     return token_data
 
 
+@router.post('/token/refresh', response_model=TokenSc, name='刷新令牌')
+async def refresh_token(request_data: OAuth2RefreshTokenSc):
+    grant = RefreshTokenGrant(request_data)
+    return await grant.respond()
+
+
 @router.delete('/token', response_model=BoolSc, name='退出登录')
-async def logout(token: Annotated[str, Depends(auth_deps.oauth2_token)]):
+async def logout(
+    token: Annotated[str, Depends(auth_deps.oauth2_token)],
+    refresh_token: str | None = Body(None, embed=True, description='刷新令牌（同时吊销其所在家族）'),
+):
     await cancel_token(token=token)
+    if refresh_token:
+        await revoke_refresh_token(refresh_token)
     return BoolSc(success=True)
 
 
 @router.get('/token/status', response_model=TokenStatusSc, name='查看当前token状态')
 async def get_token_status(token: Annotated[str, Depends(auth_deps.oauth2_token)]):
-    payload = await validate_token(token)
+    payload = await validate_token(token, strict=True)
     return TokenStatusSc(user_id=payload.sub, expires_at=payload.exp, issued_at=payload.iat, is_valid=True)
 
 
+@router.post(
+    '/token/introspect',
+    response_model=TokenIntrospectRespSc,
+    name='批量检查令牌状态（供网关使用）',
+    dependencies=[Depends(auth_deps.verify_introspection_client)],
+)
+async def introspect(request_data: TokenIntrospectReqSc):
+    return TokenIntrospectRespSc(results=await introspect_tokens(request_data.tokens))
+
+
 @router.post('/verification-codes/cellphone', response_model=BoolSc, name='发送手机验证码')
 async def send_cellphone_verification_code(cellphone: str = Body(..., embed=True, description='手机号码')):
     if not is_chinese_cellphone(cellphone):
@@ -0,0 +1,15 @@
+#
+# 内部运维接口
+#
+
+from fastapi import APIRouter, Depends, Query
+
+from app.http.deps import auth_deps
+from app.support import metrics_helper
+
+router = APIRouter(prefix='/internal', tags=['内部运维'], dependencies=[Depends(auth_deps.get_admin_user)])
+
+
+@router.get('/metrics', name='查看当前 worker 运行指标')
+async def get_metrics(source: list[str] | None = Query(None, description='只返回指定的指标，如 db_pool')):
+    return metrics_helper.collect(source)
@@ -1,13 +1,17 @@
+import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.http.deps import database_deps, request_deps
+from app.http.deps import auth_deps, database_deps, request_deps
 from app.schemas.common import BoolSc
-from app.schemas.user import UserCreateReqSc
-from app.services.auth import validation_service, verification_code_service
-from app.services.auth.user_service import create_user
+from app.schemas.user import UserCreateReqSc, UserPageSc
+from app.services.auth import user_export_service, validation_service, verification_code_service
+from app.services.auth.user_service import create_user, list_users
+from app.support.query_stats_helper import query_budget
+from app.types import EXPORT_FORMAT_TYPE, GENDER_TYPE, USER_STATE_TYPE
 
 router = APIRouter(prefix='/users', tags=['用户'])
 
@@ -18,13 +22,48 @@ async def register_user(
     client_ip: Annotated[str, Depends(request_deps.get_request_ip)],
     session: Annotated[AsyncSession, Depends(database_deps.get_db)],
 ):
-    # 验证用户名
-    await validation_service.validate_username_availability(session, user_create.username)
-    # 验证手机号
-    await validation_service.validate_cellphone_availability(session, user_create.cellphone)
+    # 验证用户名和手机号
+    await validation_service.validate_account_availability(session, user_create.username, user_create.cellphone)
     # 验证验证码
     await verification_code_service.verify_code(user_create.cellphone, user_create.cellphone_verification_code)
 
     await create_user(session, client_ip, user_create)
     await session.commit()
     return BoolSc(success=True)
+
+
+@router.get('', response_model=UserPageSc, name='用户列表', dependencies=[Depends(auth_deps.get_admin_user)])
+@query_budget(max_queries=5)  # 加载当前用户（缓存未命中时）、设置时区、查询一页数据、估算总数
+async def get_users(
+    session: Annotated[AsyncSession, Depends(database_deps.get_db)],
+    cursor: str | None = Query(None, description='上一页返回的游标'),
+    limit: int = Query(20, ge=1, le=100, description='每页数量'),
+    keyword: str | None = Query(None, min_length=3, description='按用户名、昵称、手机号搜索（至少 3 个字符）'),
+    state: USER_STATE_TYPE | None = Query(None, description='用户状态'),
+    gender: GENDER_TYPE | None = Query(None, description='性别'),
+    is_admin: bool | None = Query(None, description='是否管理员'),
+    exact_count: bool = Query(False, description='是否返回精确总数（默认返回估算值）'),
+):
+    return await list_users(
+        session,
+        limit=limit,
+        cursor=cursor,
+        keyword=keyword,
+        state=state,
+        gender=gender,
+        is_admin=is_admin,
+        exact_count=exact_count,
+    )
+
+
+@router.get('/export', name='导出用户', dependencies=[Depends(auth_deps.get_admin_user)])
+async def export_users(
+    time_zone: Annotated[str, Depends(request_deps.get_timezone)],
+    format: EXPORT_FORMAT_TYPE = Query('csv', description='导出格式'),
+):
+    filename = f'users-{datetime.date.today():%Y%m%d}.{format}'
+    return StreamingResponse(
+        user_export_service.export_users(format, time_zone),
+        media_type=user_export_service.MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
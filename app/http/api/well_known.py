@@ -0,0 +1,18 @@
+#
+# 公开元数据接口（挂载在根路径，不带 API 前缀）
+#
+
+from fastapi import APIRouter, Header, Response
+
+from app.support import jwt_helper
+from config.auth import settings
+
+router_root = APIRouter(prefix='/.well-known', tags=['公开元数据'])
+
+
+@router_root.get('/jwks.json', name='获取令牌验证公钥（JWKS）')
+async def get_jwks(if_none_match: str | None = Header(None)):
+    headers = {'Cache-Control': f'public, max-age={settings.JWT_JWKS_MAX_AGE}', 'ETag': jwt_helper.jwks_etag}
+    if if_none_match == jwt_helper.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=jwt_helper.jwks_bytes, media_type='application/json', headers=headers)
@@ -2,18 +2,17 @@
 # 鉴权依赖
 #
 
+import hmac
 from uuid import UUID
 
-import sqlalchemy as sa
-from fastapi import Depends, HTTPException, Request, WebSocket
+from fastapi import Depends, Header, HTTPException, Request, WebSocket
 from fastapi.requests import HTTPConnection
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.exceptions import AuthenticationError, InvalidUserError
-from app.http.deps.database_deps import get_db
-from app.models.user import UserModel
-from app.services.auth.token_service import validate_token
+from app.exceptions import AuthenticationError, AuthorizationError, InvalidUserError
+from app.services.auth.token_service import AuthPrincipal, validate_token
+from app.services.auth.user_cache_service import UserSnapshot, get_user_snapshot
+from config.auth import settings as auth_settings
 from config.config import settings as config_settings
 
 
@@ -34,12 +33,15 @@ class OAuth2PasswordBearerWithWebSocket(OAuth2PasswordBearer):
 oauth2_token = OAuth2PasswordBearerWithWebSocket(tokenUrl=f'{config_settings.API_PREFIX[1:]}/auth/token/password')
 
 
-async def get_auth_user(token: str = Depends(oauth2_token), session: AsyncSession = Depends(get_db)) -> UserModel:
-    payload = await validate_token(token)
+async def get_auth_user(token: str = Depends(oauth2_token)) -> UserSnapshot:
+    """获取当前认证用户的只读快照（需要修改用户时，请在处理函数中按 id 加载 UserModel）"""
+    return await _get_user_snapshot_by_token(token)
+
+
+async def _get_user_snapshot_by_token(token: str, strict: bool = False) -> UserSnapshot:
+    payload = await validate_token(token, strict=strict)
     user_id = UUID(payload.sub)
-    user = (
-        await session.execute(sa.select(UserModel).where((UserModel.id == user_id) & UserModel.exist_filter()))
-    ).scalar()
+    user = await get_user_snapshot(user_id)
 
     if not user:
         raise AuthenticationError()
@@ -48,9 +50,35 @@ async def get_auth_user(token: str = Depends(oauth2_token), session: AsyncSessio
     return user
 
 
-async def get_auth_user_dirty(
-    request_or_ws: HTTPConnection, session: AsyncSession = Depends(get_db)
-) -> UserModel | None:
+async def get_auth_claims(token: str = Depends(oauth2_token)) -> AuthPrincipal:
+    """仅根据令牌声明获取认证主体，不访问数据库
+
+    state、is_admin 为签发时的值，适合高频只读接口；需要实时用户状态时请使用 get_auth_user。
+    """
+    principal = AuthPrincipal.from_payload(await validate_token(token))
+    if principal.state is not None and principal.state != 'enabled':
+        raise InvalidUserError()
+    return principal
+
+
+async def get_admin_user(token: str = Depends(oauth2_token)) -> UserSnapshot:
+    """获取当前管理员用户（始终检查令牌吊销状态，不受 JWT_STATELESS_ACCESS_TOKEN 影响）"""
+    user = await _get_user_snapshot_by_token(token, strict=True)
+    if not user.is_admin:
+        raise AuthorizationError()
+    return user
+
+
+async def verify_introspection_client(x_introspection_secret: str | None = Header(None)):
+    """校验令牌检查接口的调用方（网关等内部服务）"""
+    secret = auth_settings.INTROSPECTION_SECRET
+    if not secret or not x_introspection_secret:
+        raise AuthorizationError()
+    if not hmac.compare_digest(x_introspection_secret.encode('utf-8'), secret.encode('utf-8')):
+        raise AuthorizationError()
+
+
+async def get_auth_user_dirty(request_or_ws: HTTPConnection) -> UserSnapshot | None:
     try:
         token = await oauth2_token(request_or_ws)
         if token is None:
@@ -64,7 +92,5 @@ async def get_auth_user_dirty(
         return None
 
     user_id = UUID(payload.sub)
-    user = (
-        await session.execute(sa.select(UserModel).where((UserModel.id == user_id) & UserModel.exist_filter()))
-    ).scalar()
+    user = await get_user_snapshot(user_id)
     return user
@@ -10,9 +10,10 @@ from app.providers import database_provider as db
 
 
 async def get_db(time_zone: str = Depends(get_timezone)):
+    session: AsyncSession = db.async_session_factory()
     try:
-        session: AsyncSession = db.async_session_factory()
-        await db.set_session_time_zone(session, time_zone)
+        # 时区在首次执行语句时才应用到连接上，且连接时区相同时不会重复设置
+        db.set_session_time_zone(session, time_zone)
 
         yield session
     finally:
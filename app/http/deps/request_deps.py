@@ -5,7 +5,9 @@
 from fastapi import Request, WebSocket
 from fastapi.requests import HTTPConnection
 
-from app.exceptions import UnknownProtocol
+from app.exceptions import UnknownProtocol, ValidationError
+from app.support.time_helper import is_valid_timezone
+from config.database import settings as db_settings
 
 
 async def get_request_ip(request_or_ws: HTTPConnection) -> str:
@@ -17,12 +19,16 @@ async def get_timezone(request_or_ws: HTTPConnection) -> str:
     """请求头中获取时区"""
     if isinstance(request_or_ws, Request):
         if 'Time-Zone' in request_or_ws.headers:
-            return request_or_ws.headers['Time-Zone']
+            time_zone = request_or_ws.headers['Time-Zone']
         elif 'X-Time-Zone' in request_or_ws.headers:
-            return request_or_ws.headers['X-Time-Zone']
+            time_zone = request_or_ws.headers['X-Time-Zone']
         else:
-            return 'Asia/Shanghai'
+            time_zone = db_settings.POSTGRES_TIME_ZONE
     elif isinstance(request_or_ws, WebSocket):
-        return request_or_ws.query_params.get('time-zone', 'Asia/Shanghai')
+        time_zone = request_or_ws.query_params.get('time-zone', db_settings.POSTGRES_TIME_ZONE)
     else:
         raise UnknownProtocol()
+
+    if not is_valid_timezone(time_zone):
+        raise ValidationError('Invalid time zone')
+    return time_zone
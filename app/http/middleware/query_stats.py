@@ -0,0 +1,45 @@
+import logging
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.support import metrics_helper, query_stats_helper
+from config.database import settings as db_settings
+
+# 疑似 N+1 查询的次数：路由路径 -> 次数
+_repeated_query_stats: dict[str, int] = {}
+
+
+def register(app: FastAPI):
+    class QueryStatsMiddleware:
+        """按请求收集执行的 SQL 语句，同一语句重复执行过多时记录疑似 N+1 查询，并检查接口声明的查询预算"""
+
+        def __init__(self, app: ASGIApp):
+            self.app = app
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send):
+            if scope['type'] != 'http':
+                await self.app(scope, receive, send)
+                return
+
+            with query_stats_helper.collect() as stats:
+                await self.app(scope, receive, send)
+
+            route = scope.get('route')
+            path = getattr(route, 'path', scope['path'])
+            repeated = stats.repeated(db_settings.SQL_REPEATED_QUERY_THRESHOLD)
+            if repeated:
+                _repeated_query_stats[path] = _repeated_query_stats.get(path, 0) + 1
+                statements = '\n'.join(
+                    f'  {statement_stats.count}x {statement}' for statement, statement_stats in repeated.items()
+                )
+                logging.warning(f'Possible N+1 queries in {scope["method"]} {path}:\n{statements}')
+
+            # 接口通过 @query_budget 声明的查询预算（统计范围为整个请求）
+            budget = getattr(getattr(route, 'endpoint', None), '__query_budget__', None)
+            if budget is not None:
+                budget.check(stats, budget.name or f'{scope["method"]} {path}')
+
+    # 注册中间件
+    app.add_middleware(QueryStatsMiddleware)
+    metrics_helper.register_source('sql_repeated_queries', lambda: dict(_repeated_query_stats))
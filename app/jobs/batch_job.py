@@ -0,0 +1,109 @@
+#
+# 分批维护任务框架
+#
+# 将大范围的数据维护（清理、归档、回填等）拆成小批次执行：每批在独立的短事务中完成，并设置锁等待超时，
+# 批次之间休眠，副本复制延迟过大时暂停。处理进度以游标形式保存在 Redis 中，中断后下次执行从断点继续。
+#
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+import sqlalchemy as sa
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.providers import database_provider as db
+from config.jobs import settings as jobs_settings
+from config.redis_key import settings as redis_key_settings
+
+_LOCK_NOT_AVAILABLE = '55P03'  # PostgreSQL 锁等待超时的错误码
+
+
+class BatchJob(ABC):
+    """分批维护任务基类，子类实现 process_batch 处理一批数据"""
+
+    def __init__(
+        self,
+        name: str,
+        batch_size: int = jobs_settings.BATCH_SIZE,
+        sleep: float = jobs_settings.BATCH_SLEEP,
+        lock_timeout: int = jobs_settings.BATCH_LOCK_TIMEOUT,
+        max_replica_lag: float = jobs_settings.BATCH_MAX_REPLICA_LAG,
+    ):
+        """
+        Args:
+            name: 任务名称（唯一，用于保存断点游标）
+            batch_size: 每批处理的行数
+            sleep: 批次之间的休眠时间（秒）
+            lock_timeout: 每批的锁等待超时（毫秒）
+            max_replica_lag: 允许的最大副本复制延迟（秒）
+        """
+        self.name = name
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self.lock_timeout = lock_timeout
+        self.max_replica_lag = max_replica_lag
+
+    @abstractmethod
+    async def process_batch(self, session: AsyncSession, cursor: str | None) -> tuple[int, str | None]:
+        """处理一批数据（在主库的事务中执行，返回后提交）
+
+        Args:
+            session: 数据库会话
+            cursor: 上一批返回的游标，为空时从头开始
+
+        Returns:
+            (处理的行数, 下一批的游标)
+        """
+
+    async def run(self) -> int:
+        """执行任务直到处理完所有数据或遇到锁等待超时，返回处理的总行数"""
+        cursor = await db.redis_client.hget(redis_key_settings.JOB_CURSOR, self.name)
+        if cursor:
+            logging.info(f'Batch job {self.name} resumes from cursor {cursor}')
+
+        total = 0
+        while True:
+            await self._wait_for_replicas()
+            try:
+                async with db.async_session_factory() as session:
+                    # 批次总是写操作，不能交给只读路由判断（如 SELECT ... FROM (DELETE ... RETURNING) 形似只读）
+                    db.use_primary(session)
+                    await session.execute(
+                        sa.text("SELECT set_config('lock_timeout', :lock_timeout, true)"),
+                        {'lock_timeout': f'{self.lock_timeout}ms'},
+                    )
+                    processed, next_cursor = await self.process_batch(session, cursor)
+                    await session.commit()
+            except DBAPIError as e:
+                if getattr(e.orig, 'sqlstate', None) != _LOCK_NOT_AVAILABLE:
+                    raise
+                logging.warning(f'Batch job {self.name} stopped on lock timeout, will resume next run')
+                break
+
+            total += processed
+            if processed < self.batch_size or next_cursor is None:
+                # 已处理到末尾，下次从头开始
+                await db.redis_client.hdel(redis_key_settings.JOB_CURSOR, self.name)
+                break
+
+            cursor = next_cursor
+            await db.redis_client.hset(redis_key_settings.JOB_CURSOR, self.name, cursor)
+            await asyncio.sleep(self.sleep)
+
+        logging.info(f'Batch job {self.name} processed {total} rows')
+        return total
+
+    async def _wait_for_replicas(self):
+        """副本复制延迟过大时等待"""
+        if not db.replica_engines:
+            return
+
+        while True:
+            await db.check_replica_lag()
+            lag = db.get_max_replica_lag()
+            if lag <= self.max_replica_lag:
+                return
+            logging.info(f'Batch job {self.name} paused, replica lag is {lag:.1f}s')
+            await asyncio.sleep(max(self.sleep, 1))
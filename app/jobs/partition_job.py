@@ -0,0 +1,107 @@
+#
+# 分区维护任务
+#
+# 为声明了 __partition__ 的模型预先创建未来的分区，并按保留期解除挂载或删除过期的分区。
+# 分区的创建与迁移中使用同一个数据库函数 create_range_partitions。
+#
+
+import datetime
+import logging
+import re
+
+import sqlalchemy as sa
+from dateutil.relativedelta import relativedelta
+
+from app.models.base_model import RangePartition, TableModel
+from app.providers import database_provider as db
+from app.support.modules_helper import get_classes_inheriting_from_base
+
+_STEPS = {
+    'day': relativedelta(days=1),
+    'week': relativedelta(weeks=1),
+    'month': relativedelta(months=1),
+    'year': relativedelta(years=1),
+}
+
+
+async def maintain_partitions():
+    """维护所有分区表的分区（单个表失败不影响其他表）"""
+    for model in _get_partitioned_models():
+        try:
+            await _maintain_table(model.__tablename__, model.__partition__)
+        except Exception:
+            logging.exception(f'Failed to maintain partitions of {model.__tablename__}')
+
+
+def _get_partitioned_models() -> list[type[TableModel]]:
+    models_dict = get_classes_inheriting_from_base('app/models', TableModel, exclude_filenames=['base_model.py'])
+    return [model for classes in models_dict.values() for model in classes.values() if model.__partition__]
+
+
+async def _maintain_table(table_name: str, partition: RangePartition):
+    # 始终在主库上执行；DETACH ... CONCURRENTLY 不能在事务中执行
+    async with db.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level='AUTOCOMMIT')
+
+        created = await connection.scalar(
+            sa.text('SELECT create_range_partitions(:table_name, :interval, :premake)'),
+            {'table_name': table_name, 'interval': partition.interval, 'premake': partition.premake},
+        )
+        if created:
+            logging.info(f'Created {created} partition(s) for {table_name}')
+
+        quote = connection.dialect.identifier_preparer.quote
+        result = await connection.execute(
+            sa.text(
+                'SELECT c.relname, i.inhdetachpending FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE i.inhparent = CAST(:table_name AS regclass)'
+            ),
+            {'table_name': table_name},
+        )
+        children = result.all()
+
+        # 中断的 DETACH ... CONCURRENTLY 会让分区停留在 detach pending 状态，且阻止该表再次并发分离，先完成它
+        detached = set()
+        for child, detach_pending in children:
+            if detach_pending:
+                await connection.execute(
+                    sa.text(f'ALTER TABLE {quote(table_name)} DETACH PARTITION {quote(child)} FINALIZE')
+                )
+                detached.add(child)
+                logging.info(f'Finalized pending detach of partition {child}')
+
+        if partition.retention is None:
+            return
+
+        cutoff = _truncate(datetime.datetime.now(datetime.timezone.utc), partition.interval)
+        cutoff -= _STEPS[partition.interval] * partition.retention
+        name_pattern = re.compile(rf'{re.escape(table_name)}_p(\d{{8}})')
+        for child, _ in children:
+            match = name_pattern.fullmatch(child)
+            if not match:
+                continue
+            start = datetime.datetime.strptime(match.group(1), '%Y%m%d').replace(tzinfo=datetime.timezone.utc)
+            if start + _STEPS[partition.interval] > cutoff:
+                continue
+
+            if child not in detached:
+                await connection.execute(
+                    sa.text(f'ALTER TABLE {quote(table_name)} DETACH PARTITION {quote(child)} CONCURRENTLY')
+                )
+            if partition.drop_expired:
+                await connection.execute(sa.text(f'DROP TABLE {quote(child)}'))
+                logging.info(f'Dropped expired partition {child}')
+            else:
+                logging.info(f'Detached expired partition {child}')
+
+
+def _truncate(value: datetime.datetime, interval: str) -> datetime.datetime:
+    """截断到分区起点（与数据库函数中的 date_trunc 一致）"""
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        return value - datetime.timedelta(days=value.weekday())
+    if interval == 'month':
+        return value.replace(day=1)
+    if interval == 'year':
+        return value.replace(month=1, day=1)
+    return value
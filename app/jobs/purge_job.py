@@ -0,0 +1,89 @@
+#
+# 软删除数据清理任务
+#
+# TableModel.delete() 只设置 deleted_at，这里按 (deleted_at, id) 顺序分批物理删除超过保留期的记录，
+# 可选在删除的同一条语句中归档到 {表名}_archive 表。
+#
+
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.jobs.batch_job import BatchJob
+from app.models.base_model import TableModel
+from app.models.user import UserModel
+from app.providers import database_provider as db
+from app.support import query_helper
+from config.jobs import settings as jobs_settings
+
+
+class PurgeDeletedJob(BatchJob):
+    """清理软删除超过保留期的记录"""
+
+    def __init__(self, model: type[TableModel], retention: datetime.timedelta, archive: bool = False, **kwargs):
+        """
+        Args:
+            model: 要清理的模型
+            retention: 保留期，deleted_at 早于当前时间减去保留期的记录会被删除
+            archive: 删除前是否归档到 {表名}_archive 表
+            **kwargs: 见 BatchJob
+        """
+        super().__init__(f'purge:{model.__tablename__}', **kwargs)
+        self.table: sa.Table = model.__table__
+        self.retention = retention
+        self.archive = archive
+        self.archive_table = sa.table(
+            f'{self.table.name}_archive', *[sa.column(column.name) for column in self.table.c]
+        )
+        self._cutoff: datetime.datetime | None = None
+
+    async def run(self) -> int:
+        self._cutoff = datetime.datetime.now(datetime.timezone.utc) - self.retention
+        if self.archive:
+            async with db.async_session_factory() as session:
+                await session.execute(
+                    sa.text(f'CREATE TABLE IF NOT EXISTS {self.archive_table.name} (LIKE {self.table.name})')
+                )
+                await session.commit()
+        return await super().run()
+
+    async def process_batch(self, session: AsyncSession, cursor: str | None) -> tuple[int, str | None]:
+        table = self.table
+        conditions = [table.c.deleted_at < self._cutoff]
+        if cursor:
+            deleted_at, id = query_helper.decode_cursor(cursor)
+            conditions.append(sa.tuple_(table.c.deleted_at, table.c.id) > sa.tuple_(deleted_at, id))
+
+        # 被其他事务锁定的行跳过，下一轮再处理
+        batch = (
+            sa.select(table.c.id)
+            .where(*conditions)
+            .order_by(table.c.deleted_at, table.c.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .cte('batch')
+        )
+        deleted = table.delete().where(table.c.id == batch.c.id).returning(*table.c).cte('deleted')
+        if self.archive:
+            statement = (
+                self.archive_table.insert()
+                .from_select([column.name for column in table.c], sa.select(*deleted.c))
+                .returning(self.archive_table.c.deleted_at, self.archive_table.c.id)
+            )
+        else:
+            statement = sa.select(deleted.c.deleted_at, deleted.c.id)
+
+        rows = (await session.execute(statement)).all()
+        if not rows:
+            return 0, None
+        return len(rows), query_helper.encode_cursor(*max(rows))
+
+
+async def purge_deleted_users():
+    """清理软删除超过保留期的用户"""
+    await PurgeDeletedJob(
+        UserModel,
+        retention=datetime.timedelta(days=jobs_settings.USER_PURGE_RETENTION_DAYS),
+        archive=jobs_settings.USER_PURGE_ARCHIVE,
+    ).run()
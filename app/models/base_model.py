@@ -1,15 +1,42 @@
+import dataclasses
 import datetime
 import uuid
+import warnings
+from collections.abc import Awaitable, Callable, Iterable, Sequence
 from pathlib import Path
+from typing import Any, Literal
 
 import sqlalchemy as sa
 from alembic_dddl import DDL as alembic_DDL
 from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, MappedAsDataclass, mapped_column
 
 from config.database import settings as db_settings
 
+# 按查询形状缓存的语句：(模型类, 形状名称) -> 语句
+_statement_cache: dict[tuple[type, str], sa.Executable] = {}
+# 每个模型的“未删除”过滤条件（不含参数，只需构建一次）
+_exist_filters: dict[type, sa.ColumnElement[bool]] = {}
+# 批量写入（bulk_create、bulk_upsert）的监听函数：模型类 -> [listener(session, ids, columns)]
+_bulk_write_listeners: dict[type, list[Callable[[AsyncSession, list[uuid.UUID], set[str]], Awaitable[None]]]] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class RangePartition:
+    """按时间范围分区的声明，在模型中通过 __partition__ 指定
+
+    分区表的主键会扩展为 (id, 分区列)，唯一约束也必须包含分区列。
+    分区以 UTC 时间对齐，子表命名为 {表名}_p{起始日期}，如 events_p20250101。
+    """
+
+    column: str = 'created_at'  # 分区列（必须为非空的 timestamptz 列）
+    interval: Literal['day', 'week', 'month', 'year'] = 'month'  # 每个分区的时间跨度
+    premake: int = 3  # 预先创建的未来分区数
+    retention: int | None = None  # 保留的历史分区数（不含当前分区），None 表示不清理
+    drop_expired: bool = False  # 过期分区是否删除，否则只解除挂载（保留为普通表，便于归档）
+
 
 def load_sql(filename: str) -> str:
     """加载sql脚本"""
@@ -69,6 +96,12 @@ class Base(AsyncAttrs, MappedAsDataclass, DeclarativeBase):
                 sql='CREATE EXTENSION IF NOT EXISTS fuzzystrmatch;',
                 down_sql='DROP EXTENSION IF EXISTS fuzzystrmatch;',
             ),
+            # 函数：为范围分区表创建当前及未来的分区
+            alembic_DDL(
+                name='func-create_range_partitions',
+                sql=load_sql('func-create_range_partitions.sql'),
+                down_sql='DROP FUNCTION IF EXISTS create_range_partitions;',
+            ),
             # 触发器函数：更新表的 updated_at 字段
             alembic_DDL(
                 name='tgr_func-update_updated_at_column',
@@ -102,6 +135,7 @@ class ViewModel(Base):
 class TableModel(Base):
     __abstract__ = True
     __mapper_args__ = {'eager_defaults': True}
+    __partition__ = None  # 分区声明（RangePartition），为 None 时不分区
 
     # 对于数据库自动生成的字段，必须加上 init=False，否则创建对象时会提示缺少参数
     id: Mapped[uuid.UUID] = mapped_column(
@@ -117,6 +151,34 @@ class TableModel(Base):
         TIMESTAMP(timezone=True), default=None, nullable=True, server_default=sa.text('NULL'), init=False
     )
 
+    def __init_subclass__(cls, **kwargs):
+        partition: RangePartition | None = cls.__dict__.get('__partition__')
+        if partition is None:
+            super().__init_subclass__(**kwargs)
+            return
+
+        # 分区表的主键必须包含分区列；ORM 中仍只以 id 标识记录
+        table_args = cls.__dict__.get('__table_args__', ())
+        if isinstance(table_args, dict):
+            table_args = (table_args,)
+        options = table_args[-1] if table_args and isinstance(table_args[-1], dict) else {}
+        constraints = table_args[:-1] if options else table_args
+        cls.__table_args__ = (
+            *constraints,
+            sa.PrimaryKeyConstraint('id', partition.column),
+            {**options, 'postgresql_partition_by': f'RANGE ({partition.column})'},
+        )
+        cls.__mapper_args__ = {
+            **TableModel.__mapper_args__,
+            'primary_key': ['id'],
+            **cls.__dict__.get('__mapper_args__', {}),
+        }
+
+        with warnings.catch_warnings():
+            # id 列声明了 primary_key=True，与上面的复合主键不一致，这里以复合主键为准
+            warnings.filterwarnings('ignore', message='.*specifies columns .* as primary_key=True.*')
+            super().__init_subclass__(**kwargs)
+
     @classmethod
     async def get(cls, session: AsyncSession, pk: int):
         return await session.get(cls, pk)
@@ -125,6 +187,187 @@ class TableModel(Base):
     async def get_one(cls, session: AsyncSession, filter):
         return await session.scalar(sa.select(cls).where(filter))
 
+    @classmethod
+    async def get_one_by(cls, session: AsyncSession, include_deleted: bool = False, **values):
+        """按列值相等条件查询一条记录，同一组列名的语句只构建一次
+
+        Args:
+            session: 数据库会话
+            include_deleted: 是否包含已删除的记录
+            **values: 列名 -> 值
+        """
+        columns = sorted(values)
+        shape = f'get_one_by:{",".join(columns)}{":include_deleted" if include_deleted else ""}'
+
+        def build():
+            conditions = [getattr(cls, column) == sa.bindparam(column) for column in columns]
+            if not include_deleted:
+                conditions.append(cls.exist_filter())
+            return sa.select(cls).where(*conditions)
+
+        return await session.scalar(cls.cached_statement(shape, build), values)
+
+    @classmethod
+    def cached_statement(cls, shape: str, build: Callable[[], sa.Executable]) -> sa.Executable:
+        """按查询形状缓存语句对象
+
+        语句中的参数需用 sa.bindparam 声明，执行时通过参数字典传入。复用同一语句对象时，
+        SQLAlchemy 无需重新构建表达式树和计算缓存键，可直接命中编译缓存。
+
+        Args:
+            shape: 形状名称（同一模型内唯一），同时作为指标中的语句名称
+            build: 构建语句的函数，仅在首次使用时调用
+        """
+        statement = _statement_cache.get((cls, shape))
+        if statement is None:
+            statement = build().execution_options(statement_name=f'{cls.__name__}.{shape}')
+            _statement_cache[(cls, shape)] = statement
+        return statement
+
+    @classmethod
+    async def bulk_create(cls, session: AsyncSession, rows: Sequence[dict[str, Any]]) -> list[uuid.UUID]:
+        """批量插入记录，返回与输入顺序一致的主键列表
+
+        行数少于 POSTGRES_BULK_COPY_THRESHOLD 时使用多行 INSERT（按 insertmanyvalues 分批），
+        否则使用 COPY。列的 Python 默认值（如主键 uuid4）在客户端填充，服务端默认值（如 created_at）
+        由数据库生成，不会回填。
+        写入绕过 ORM，不会触发 ORM 事件（after_insert 等），写入后调用 listen_bulk_write 注册的监听函数。
+
+        Args:
+            session: 数据库会话
+            rows: 列名 -> 值，所有行的列名必须相同
+        """
+        if not rows:
+            return []
+
+        table = cls.__table__
+        columns, rows = cls._fill_defaults(rows)
+        if len(rows) >= db_settings.POSTGRES_BULK_COPY_THRESHOLD:
+            await cls._copy_rows(session, table.name, columns, rows)
+        else:
+            await session.execute(sa.insert(table), rows)
+
+        ids = [row['id'] for row in rows]
+        await cls._notify_bulk_write(session, ids, set())
+        return ids
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict[str, Any]],
+        conflict_columns: Iterable[str] = ('id',),
+        update_columns: Iterable[str] = None,
+        index_where: sa.ColumnElement[bool] = None,
+    ) -> list[uuid.UUID]:
+        """批量插入或更新记录（INSERT ... ON CONFLICT DO UPDATE），返回插入或更新的主键列表
+
+        行数达到 POSTGRES_BULK_COPY_THRESHOLD 时，先 COPY 到临时表，再用一条 INSERT ... SELECT 合并。
+        同一批数据中冲突列的值不能重复。大批量时返回的主键顺序不保证与输入一致。
+        写入绕过 ORM，不会触发 ORM 事件（after_update 等），写入后调用 listen_bulk_write 注册的监听函数。
+
+        Args:
+            session: 数据库会话
+            rows: 列名 -> 值，所有行的列名必须相同
+            conflict_columns: 冲突判断列（需有唯一约束或唯一索引）；分区表会自动补上分区列
+            update_columns: 冲突时更新的列，默认为除冲突列、主键和 created_at 外传入的所有列
+            index_where: 冲突列对应部分唯一索引的条件，如 sa.text('deleted_at IS NULL')
+        """
+        if not rows:
+            return []
+
+        table = cls.__table__
+        conflict_columns = list(conflict_columns)
+        # 分区表的唯一约束必须包含分区列，冲突判断列同样需要包含
+        if cls.__partition__ and cls.__partition__.column not in conflict_columns:
+            conflict_columns.append(cls.__partition__.column)
+        if update_columns is None:
+            update_columns = [
+                column for column in rows[0] if column not in conflict_columns and column not in ('id', 'created_at')
+            ]
+        columns, rows = cls._fill_defaults(rows)
+
+        if len(rows) < db_settings.POSTGRES_BULK_COPY_THRESHOLD:
+            statement = pg_insert(table)
+            source_rows = rows
+        else:
+            # 临时表在事务提交时自动删除
+            staging_name = f'_bulk_{table.name}_{uuid.uuid4().hex[:8]}'
+            await session.execute(
+                sa.text(f'CREATE TEMP TABLE {staging_name} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP')
+            )
+            await cls._copy_rows(session, staging_name, columns, rows)
+            staging = sa.table(staging_name, *[sa.column(column) for column in columns])
+            statement = pg_insert(table).from_select(columns, sa.select(*staging.c))
+            source_rows = None
+
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=conflict_columns,
+                index_where=index_where,
+                set_={column: statement.excluded[column] for column in update_columns},
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_columns, index_where=index_where)
+
+        result = await session.execute(statement.returning(table.c.id), source_rows)
+        ids = list(result.scalars())
+        await cls._notify_bulk_write(session, ids, set(update_columns))
+        return ids
+
+    @classmethod
+    def listen_bulk_write(cls, listener: Callable[[AsyncSession, list[uuid.UUID], set[str]], Awaitable[None]]):
+        """注册批量写入的监听函数（可用作装饰器）
+
+        bulk_create、bulk_upsert 绕过 ORM 写入，依赖 ORM 事件维护的缓存等需通过此函数得到通知。
+        监听函数在写入所在的事务中、提交前调用。
+
+        Args:
+            listener: 异步函数 listener(session, ids, columns)，ids 为插入或更新的主键，
+                columns 为已有记录被更新的列名（bulk_create 时为空集合）
+        """
+        _bulk_write_listeners.setdefault(cls, []).append(listener)
+        return listener
+
+    @classmethod
+    async def _notify_bulk_write(cls, session: AsyncSession, ids: list[uuid.UUID], columns: set[str]):
+        if not ids:
+            return
+        for listener in _bulk_write_listeners.get(cls, ()):
+            await listener(session, ids, columns)
+
+    @classmethod
+    def _fill_defaults(cls, rows: Sequence[dict[str, Any]]) -> tuple[list[str], list[dict[str, Any]]]:
+        """填充列的 Python 默认值，返回 (列名列表, 填充后的行)"""
+        keys = rows[0].keys()
+        defaults = [
+            (column.key, column.default)
+            for column in cls.__table__.columns
+            if column.key not in keys
+            and column.default is not None
+            and (column.default.is_scalar or column.default.is_callable)
+        ]
+        columns = [*keys, *(key for key, _ in defaults)]
+
+        filled = []
+        for row in rows:
+            if row.keys() != keys:
+                raise ValueError('All rows must have the same columns')
+            row = dict(row)
+            for key, default in defaults:
+                row[key] = default.arg(None) if default.is_callable else default.arg
+            filled.append(row)
+        return columns, filled
+
+    @staticmethod
+    async def _copy_rows(session: AsyncSession, table_name: str, columns: list[str], rows: list[dict[str, Any]]):
+        """通过 asyncpg 的 COPY 写入数据（在会话当前的事务中执行）"""
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table_name, records=[tuple(row[column] for column in columns) for row in rows], columns=columns
+        )
+
     @classmethod
     def get_ext_alembic_ddls(cls):
         down_sql = f'DROP TRIGGER IF EXISTS tgr_update_updated_at_column ON {cls.__tablename__};'
@@ -142,11 +385,25 @@ class TableModel(Base):
             )
         ]
 
+        if partition := cls.__partition__:
+            # 分区表创建后立即创建当前及未来的分区，之后由定时任务 partition_job 维护
+            util_schema_list.append(
+                alembic_DDL(
+                    name=f'partitions-{cls.__tablename__}',
+                    sql=f"SELECT create_range_partitions('{cls.__tablename__}', '{partition.interval}', "
+                    f'{partition.premake});',
+                    down_sql='',
+                )
+            )
+
         return util_schema_list
 
     @classmethod
     def exist_filter(cls):
-        return sa.or_(cls.deleted_at.is_(None), (cls.deleted_at > sa.func.now()))
+        exist_filter = _exist_filters.get(cls)
+        if exist_filter is None:
+            exist_filter = _exist_filters[cls] = sa.or_(cls.deleted_at.is_(None), (cls.deleted_at > sa.func.now()))
+        return exist_filter
 
     def is_archived(self):
         return self.deleted_at is not None and self.deleted_at <= datetime.datetime.now(datetime.timezone.utc)
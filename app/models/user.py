@@ -1,5 +1,6 @@
 import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base_model import TableModel
@@ -14,11 +15,34 @@ class UserModel(TableModel):
     """用户表"""
 
     __tablename__ = 'users'
+    __table_args__ = (
+        # 用户名、手机号只在未删除的记录中唯一（now() 不能用于索引条件，预约删除的记录由业务校验兜底）
+        sa.Index('uq_users_username_live', 'username', unique=True, postgresql_where=sa.text('deleted_at IS NULL')),
+        sa.Index('uq_users_cellphone_live', 'cellphone', unique=True, postgresql_where=sa.text('deleted_at IS NULL')),
+        # 登录、可用性校验的条件包含预约删除的记录，用不上部分索引，另需普通索引
+        sa.Index('ix_users_username', 'username'),
+        sa.Index('ix_users_cellphone', 'cellphone'),
+        # 清理任务按 (deleted_at, id) 顺序分批扫描已删除的用户
+        sa.Index('ix_users_deleted_at_id', 'deleted_at', 'id', postgresql_where=sa.text('deleted_at IS NOT NULL')),
+        # 用户列表的 keyset 分页（按创建时间倒序，反向扫描即可）
+        sa.Index('ix_users_created_at_id', 'created_at', 'id'),
+        sa.Index('ix_users_state_created_at_id', 'state', 'created_at', 'id'),
+        # 用户名、昵称、手机号的模糊搜索（ILIKE '%...%'）
+        sa.Index(
+            'ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}
+        ),
+        sa.Index(
+            'ix_users_nickname_trgm', 'nickname', postgresql_using='gin', postgresql_ops={'nickname': 'gin_trgm_ops'}
+        ),
+        sa.Index(
+            'ix_users_cellphone_trgm', 'cellphone', postgresql_using='gin', postgresql_ops={'cellphone': 'gin_trgm_ops'}
+        ),
+    )
 
     nickname: Mapped[str] = mapped_column(sa.String(255, collation='zh-x-icu')) # 昵称
-    username: Mapped[str] = mapped_column(sa.String(255), unique=True)  # 用户名
+    username: Mapped[str] = mapped_column(sa.String(255))  # 用户名
     password: Mapped[str | None] = mapped_column(sa.String(255), default=None)  # 密码
-    cellphone: Mapped[str | None] = mapped_column(sa.String(45), unique=True, default=None)  # 手机号
+    cellphone: Mapped[str | None] = mapped_column(sa.String(45), default=None)  # 手机号
     state: Mapped[USER_STATE_TYPE] = mapped_column(
         USER_STATE_PG_TYPE, default='enabled', server_default='enabled'
     )  # 用户状态
@@ -28,3 +52,15 @@ class UserModel(TableModel):
 
     def is_enabled(self) -> bool:
         return self.state == 'enabled' and not self.is_archived()
+
+    @classmethod
+    async def get_by_account(cls, session: AsyncSession, account: str) -> 'UserModel | None':
+        """按用户名或手机号查询未删除的用户（登录用）"""
+        statement = cls.cached_statement(
+            'get_by_account',
+            lambda: sa.select(cls).where(
+                (cls.username == sa.bindparam('account')) | (cls.cellphone == sa.bindparam('account')),
+                cls.exist_filter(),
+            ),
+        )
+        return await session.scalar(statement, {'account': account})
@@ -0,0 +1,93 @@
+#
+# 跨 worker 广播
+#
+# 基于 Redis pub/sub，在各 uvicorn worker 之间广播缓存失效等消息。
+# 订阅在应用启动时建立；连接中断重连后会调用重置钩子，由各缓存自行清空，避免遗漏消息导致脏数据。
+#
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable
+
+from app.providers.database_provider import redis_client
+
+_handlers: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+_reset_hooks: list[Callable[[], None]] = []
+_listener_task: asyncio.Task | None = None
+
+_RECONNECT_DELAY = 1  # 断线重连间隔（秒）
+
+
+def subscribe(channel: str, handler: Callable[[str], None]):
+    """注册频道消息处理函数（需在应用启动前调用）
+
+    Args:
+        channel: 频道名
+        handler: 同步处理函数，参数为消息内容
+    """
+    _handlers[channel].append(handler)
+
+
+def on_reset(hook: Callable[[], None]):
+    """注册重置钩子，订阅（重新）建立时调用"""
+    _reset_hooks.append(hook)
+
+
+async def publish(channel: str, message: str):
+    """向所有 worker（包括自身）广播消息"""
+    await redis_client.publish(channel, message)
+
+
+async def start():
+    """启动后台订阅任务"""
+    global _listener_task
+    if _listener_task is None and _handlers:
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop():
+    """停止后台订阅任务"""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+
+
+async def _listen():
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(*_handlers.keys())
+            _run_reset_hooks()
+
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                for handler in _handlers.get(message['channel'], ()):
+                    try:
+                        handler(message['data'])
+                    except Exception as e:
+                        logging.error(f'Broadcast handler error on {message["channel"]}: {e}')
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f'Broadcast subscription lost, reconnecting: {e}')
+            await asyncio.sleep(_RECONNECT_DELAY)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+def _run_reset_hooks():
+    for hook in _reset_hooks:
+        try:
+            hook()
+        except Exception as e:
+            logging.error(f'Broadcast reset hook error: {e}')
@@ -1,28 +1,354 @@
+#
+# 数据库与 Redis 连接
+#
+# 主库引擎 engine 处理全部写入。配置了只读副本（POSTGRES_REPLICA_HOSTS）时，会话按语句路由：
+# 只读查询发往复制延迟在阈值内的副本，写入、flush 以及同一会话中写入之后的查询都使用主库（读己之写）。
+#
+
+import asyncio
+import itertools
+import logging
+import time
+
 import redis.asyncio as redis
 import sqlalchemy as sa
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import app.providers.sqlalchemy_provider  # noqa: F401
+from app.support import metrics_helper
 from config.config import settings as config_settings
 from config.database import redis_settings
 from config.database import settings as db_settings
 
-engine = create_async_engine(
-    db_settings.SQLALCHEMY_DATABASE_URL,
-    pool_size=4,
-    # echo_pool='debug' if config_settings.DEBUG else False,
-    echo='debug' if config_settings.DEBUG else False,
+
+class _PoolMetrics:
+    """单个连接池的运行指标"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.checkout_wait_time = metrics_helper.Histogram()  # 获取连接的等待耗时（毫秒），含新建连接的耗时
+        self.connected_at: dict[int, float] = {}  # id(连接记录) -> 建立时间
+
+
+_pool_metrics: dict[str, _PoolMetrics] = {}  # 连接池名称 -> 指标
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """记录获取连接等待耗时的连接池"""
+
+    def _do_get(self):
+        metrics = _pool_metrics[self.logging_name]
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa.exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.checkout_wait_time.observe((time.perf_counter() - started_at) * 1000)
+
+
+def _create_engine(name: str, host: str, port: int) -> AsyncEngine:
+    """创建数据库引擎，并注册连接池指标与连接时区跟踪
+
+    Args:
+        name: 连接池名称（primary、replica-0 ...）
+        host: 数据库主机
+        port: 数据库端口
+    """
+    url = (
+        sa.make_url(db_settings.SQLALCHEMY_DATABASE_URL)
+        .set(host=host, port=port)
+        .update_query_dict({'prepared_statement_cache_size': str(db_settings.POSTGRES_STATEMENT_CACHE_SIZE)})
+    )
+    async_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=db_settings.POSTGRES_POOL_SIZE,
+        max_overflow=db_settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=db_settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=db_settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=db_settings.POSTGRES_POOL_PRE_PING,
+        connect_args={
+            # 新连接直接使用默认时区，只有请求指定了其他时区时才需要 SET
+            'server_settings': {'timezone': db_settings.POSTGRES_TIME_ZONE},
+            'statement_cache_size': db_settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        },
+        # echo_pool='debug' if config_settings.DEBUG else False,
+        echo='debug' if config_settings.DEBUG else False,
+    )
+    metrics = _pool_metrics[name] = _PoolMetrics()
+
+    def track_connection_opened(dbapi_connection, connection_record):
+        metrics.connected_at[id(connection_record)] = time.monotonic()
+
+    def track_connection_closed(dbapi_connection, connection_record):
+        metrics.connected_at.pop(id(connection_record), None)
+
+    def track_connection_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    def track_connection_invalidated(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, 'connect', track_connection_opened)
+    event.listen(sync_engine, 'close', track_connection_closed)
+    event.listen(sync_engine, 'checkout', track_connection_checkout)
+    event.listen(sync_engine, 'invalidate', track_connection_invalidated)
+    event.listen(sync_engine, 'connect', _init_connection_time_zone)
+    event.listen(sync_engine, 'commit', _commit_connection_time_zone)
+    event.listen(sync_engine, 'rollback', _rollback_connection_time_zone)
+    event.listen(sync_engine, 'reset', _reset_connection_time_zone)
+    return async_engine
+
+
+def _get_pool_stats() -> dict:
+    stats = {}
+    now = time.monotonic()
+    for name, async_engine in chain_engines():
+        pool = async_engine.sync_engine.pool
+        metrics = _pool_metrics[name]
+        ages = [now - connected_at for connected_at in metrics.connected_at.values()]
+        stats[name] = {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': db_settings.POSTGRES_MAX_OVERFLOW,
+            'checkouts': metrics.checkouts,
+            'timeouts': metrics.timeouts,
+            'invalidations': metrics.invalidations,
+            'checkout_wait_ms': metrics.checkout_wait_time.snapshot(),
+            'connection_age_seconds': {
+                'count': len(ages),
+                'min': round(min(ages), 3) if ages else None,
+                'max': round(max(ages), 3) if ages else None,
+                'avg': round(sum(ages) / len(ages), 3) if ages else None,
+            },
+        }
+    return stats
+
+
+# 时区切换统计：applied 为实际发送 set_config 的次数，skipped 为连接时区已一致而省去的次数
+_time_zone_stats = {'applied': 0, 'skipped': 0}
+
+
+def set_session_time_zone(session: AsyncSession, time_zone: str) -> None:
+    """设置会话使用的时区（不立即执行 SQL，在会话开启事务时按需应用到连接上）
+
+    Args:
+        session: 数据库会话
+        time_zone: 时区名称，调用方需先校验（见 time_helper.is_valid_timezone）
+    """
+    session.info['time_zone'] = time_zone
+
+
+# 每个连接在 connection.info 中记录当前时区：
+#   - time_zone：已生效的时区
+#   - pending_time_zone：本事务中设置、尚未提交的时区（事务回滚时 PostgreSQL 会撤销 SET）
+
+
+def _init_connection_time_zone(dbapi_connection, connection_record):
+    connection_record.info['time_zone'] = db_settings.POSTGRES_TIME_ZONE
+
+
+@event.listens_for(Session, 'after_begin')
+def _apply_session_time_zone(session: Session, transaction, connection: sa.Connection):
+    time_zone = session.info.get('time_zone', db_settings.POSTGRES_TIME_ZONE)
+    if connection.info.get('time_zone') == time_zone:
+        _time_zone_stats['skipped'] += 1
+        return
+
+    connection.execute(sa.text("SELECT set_config('TimeZone', :time_zone, false)"), {'time_zone': time_zone})
+    connection.info['pending_time_zone'] = time_zone
+    _time_zone_stats['applied'] += 1
+
+
+def _commit_connection_time_zone(connection: sa.Connection):
+    if 'pending_time_zone' in connection.info:
+        connection.info['time_zone'] = connection.info.pop('pending_time_zone')
+
+
+def _rollback_connection_time_zone(connection: sa.Connection):
+    connection.info.pop('pending_time_zone', None)
+
+
+def _reset_connection_time_zone(dbapi_connection, connection_record, reset_state):
+    # 归还连接池时的回滚同样会撤销未提交的 SET
+    connection_record.info.pop('pending_time_zone', None)
+
+
+def _parse_host(host: str) -> tuple[str, int]:
+    host, _, port = host.partition(':')
+    return host, int(port or db_settings.POSTGRES_PORT)
+
+
+engine = _create_engine('primary', db_settings.POSTGRES_HOST, db_settings.POSTGRES_PORT)
+
+# 只读副本引擎：名称 -> 引擎
+replica_engines: dict[str, AsyncEngine] = {
+    f'replica-{i}': _create_engine(f'replica-{i}', *_parse_host(host))
+    for i, host in enumerate(db_settings.POSTGRES_REPLICA_HOSTS)
+}
+
+
+def chain_engines():
+    """遍历全部引擎：(名称, 引擎)"""
+    return itertools.chain([('primary', engine)], replica_engines.items())
+
+
+# 副本复制延迟（秒），None 表示不可用或尚未检查；只有延迟不超过 POSTGRES_REPLICA_MAX_LAG 的副本参与路由
+_replica_lag: dict[str, float | None] = dict.fromkeys(replica_engines)
+_replica_counter = itertools.count()
+_replica_monitor_task: asyncio.Task | None = None
+_route_stats = {'primary': 0, 'replica': 0, 'fallback': 0}  # fallback：没有可用副本时改走主库的只读查询
+
+_REPLICA_LAG_SQL = sa.text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
 )
 
 
+class RoutingSession(Session):
+    """读写分离会话
+
+    只读的 SELECT 发往副本（同一会话固定使用首次选中的副本），其余语句、flush 以及 SELECT ... FOR UPDATE 使用主库；
+    会话一旦写入，之后的查询都使用主库，保证同一请求内读己之写（包括提交之后）。
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get('use_primary'):
+            _route_stats['primary'] += 1
+            return engine.sync_engine
+
+        if self._flushing or not _is_read_only(clause):
+            self.info['use_primary'] = True
+            _route_stats['primary'] += 1
+            return engine.sync_engine
+
+        replica_name = self.info.get('replica')
+        if replica_name is None or not _is_replica_available(replica_name):
+            replica_name = self.info['replica'] = _choose_replica()
+        if replica_name is None:
+            _route_stats['fallback'] += 1
+            return engine.sync_engine
+
+        _route_stats['replica'] += 1
+        return replica_engines[replica_name].sync_engine
+
+
+def use_primary(session: AsyncSession):
+    """让会话之后的所有查询都使用主库（需要读取刚写入的数据时调用）"""
+    session.info['use_primary'] = True
+
+
+def _is_read_only(clause) -> bool:
+    return (
+        clause is not None
+        and getattr(clause, 'is_select', False)
+        and getattr(clause, '_for_update_arg', None) is None
+    )
+
+
+def _is_replica_available(name: str) -> bool:
+    lag = _replica_lag[name]
+    return lag is not None and lag <= db_settings.POSTGRES_REPLICA_MAX_LAG
+
+
+def _choose_replica() -> str | None:
+    available = [name for name in replica_engines if _is_replica_available(name)]
+    if not available:
+        return None
+    if db_settings.POSTGRES_REPLICA_STRATEGY == 'least_loaded':
+        return min(available, key=lambda name: replica_engines[name].sync_engine.pool.checkedout())
+    return available[next(_replica_counter) % len(available)]
+
+
+async def check_replica_lag():
+    """检查各副本的复制延迟，连接失败的副本暂不参与路由"""
+    for name, replica in replica_engines.items():
+        try:
+            async with replica.connect() as connection:
+                lag = await asyncio.wait_for(
+                    connection.scalar(_REPLICA_LAG_SQL), timeout=db_settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL
+                )
+            _replica_lag[name] = float(lag or 0)
+        except Exception as e:
+            if _replica_lag[name] is not None:
+                logging.warning(f'Database replica {name} is unavailable: {e}')
+            _replica_lag[name] = None
+
+
+def get_max_replica_lag() -> float:
+    """获取可连接副本中最大的复制延迟（秒），没有副本时为 0
+
+    延迟数据来自 check_replica_lag，未启动延迟检查的进程需先调用它。
+    """
+    return max((lag for lag in _replica_lag.values() if lag is not None), default=0)
+
+
+async def start_replica_monitor():
+    """启动副本延迟检查（未配置副本时不做任何事）"""
+    global _replica_monitor_task
+    if not replica_engines or _replica_monitor_task is not None:
+        return
+
+    await check_replica_lag()
+    _replica_monitor_task = asyncio.create_task(_monitor_replicas())
+
+
+async def stop_replica_monitor():
+    global _replica_monitor_task
+    if _replica_monitor_task is not None:
+        _replica_monitor_task.cancel()
+        try:
+            await _replica_monitor_task
+        except asyncio.CancelledError:
+            pass
+        _replica_monitor_task = None
+
+    for replica in replica_engines.values():
+        await replica.dispose()
+
+
+async def _monitor_replicas():
+    while True:
+        await asyncio.sleep(db_settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL)
+        await check_replica_lag()
+
+
+def _get_replica_stats() -> dict:
+    return {
+        'routes': dict(_route_stats),
+        'replicas': {
+            name: {'lag_seconds': lag, 'available': _is_replica_available(name)}
+            for name, lag in _replica_lag.items()
+        },
+    }
+
+
 # 异步数据库会话
 async_session_factory = async_sessionmaker(
-    autocommit=False, autoflush=True, bind=engine, class_=AsyncSession, expire_on_commit=False
+    autocommit=False,
+    autoflush=True,
+    bind=engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession if replica_engines else Session,
+    expire_on_commit=False,
 )
 
 
-async def set_session_time_zone(session: AsyncSession, time_zone: str = 'Asia/Shanghai') -> None:
-    await session.execute(sa.text(f"SET TIME ZONE '{time_zone}'"))
+metrics_helper.register_source('db_pool', _get_pool_stats)
+metrics_helper.register_source('db_time_zone', lambda: dict(_time_zone_stats))
+if replica_engines:
+    metrics_helper.register_source('db_replicas', _get_replica_stats)
 
 
 # redis
@@ -1,10 +1,16 @@
+import logging
+import socket
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi_limiter import FastAPILimiter
 
 import app.providers.rate_limiter_provider as rate_limiter_provider
+from app.providers import broadcast_provider, database_provider
 from app.providers.database_provider import async_session_factory, redis_client
+from app.support import password_helper
+from config.auth import settings as auth_settings
+from config.redis_key import settings as redis_key_settings
 
 
 @asynccontextmanager
@@ -17,10 +23,26 @@ async def lifespan(app: FastAPI):
         ws_callback=rate_limiter_provider.ws_default_callback,
     )
 
+    # 校准 bcrypt 成本因子
+    if auth_settings.PASSWORD_HASH_TARGET_MS > 0:
+        await _calibrate_password_hash_rounds()
+
+    # 订阅跨 worker 广播（缓存失效等）
+    await broadcast_provider.start()
+
+    # 检查只读副本的复制延迟
+    await database_provider.start_replica_monitor()
+
     # This hook ensures that a connection is opened to handle any queries
     yield
     # This hook ensures that the connection is closed when we've finished processing the request.
 
+    # 停止广播订阅
+    await broadcast_provider.stop()
+
+    # 停止副本延迟检查
+    await database_provider.stop_replica_monitor()
+
     # 关闭限流器
     await FastAPILimiter.close()
 
@@ -28,3 +50,21 @@ async def lifespan(app: FastAPI):
 
     if redis_client:
         await redis_client.close()
+
+
+async def _calibrate_password_hash_rounds():
+    """按目标耗时校准 bcrypt 成本因子
+
+    同一主机上的 worker 共用最先写入 Redis 的校准结果，避免各 worker 测量误差导致成本不一致。
+    """
+    target_ms = auth_settings.PASSWORD_HASH_TARGET_MS
+    key = f'{redis_key_settings.PASSWORD_HASH_ROUNDS}:{socket.gethostname()}:{target_ms}'
+
+    rounds = await redis_client.get(key)
+    if rounds is None:
+        calibrated = await password_helper.acalibrate_rounds(target_ms)
+        await redis_client.set(key, calibrated, ex=60 * 60 * 24 * 7, nx=True)
+        rounds = await redis_client.get(key) or calibrated
+
+    password_helper.set_rounds(int(rounds))
+    logging.info(f'bcrypt rounds set to {password_helper.get_rounds()} (target {target_ms}ms)')
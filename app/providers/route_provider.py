@@ -9,6 +9,7 @@ from config.config import settings
 def boot(app: FastAPI):
     routers_dict = get_attributes_from_all_modules('app/http/api', 'router')
     router_ws_dict = get_attributes_from_all_modules('app/http/api', 'router_ws')
+    router_root_dict = get_attributes_from_all_modules('app/http/api', 'router_root')
 
     app_http = APIRouter(
         dependencies=[
@@ -23,14 +24,24 @@ def boot(app: FastAPI):
         ]
     )
 
+    app_root = APIRouter(
+        dependencies=[
+            Depends(RateLimiter(times=settings.QPS, seconds=1, callback=rate_limiter_provider.http_app_callback))
+        ]
+    )
+
     for router in routers_dict.values():
         app_http.include_router(router)
     for router in router_ws_dict.values():
         app_ws.include_router(router)
+    for router in router_root_dict.values():
+        app_root.include_router(router)
 
     # 注册api路由
     app.include_router(app_http, prefix=settings.API_PREFIX)
     app.include_router(app_ws, prefix=settings.API_PREFIX)
+    # 注册根路径路由（如 /.well-known，需保持固定路径）
+    app.include_router(app_root)
 
     # 打印路由
     if app.debug:
@@ -38,3 +49,5 @@ def boot(app: FastAPI):
             print({'path': route.path, 'name': route.name, 'methods': route.methods})
         for route in app_ws.routes:
             print({'path': route.path, 'name': route.name, 'methods': ['WebSocket']})
+        for route in app_root.routes:
+            print({'path': route.path, 'name': route.name, 'methods': route.methods})
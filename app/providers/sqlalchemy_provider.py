@@ -1,9 +1,161 @@
+import functools
+import logging
+import re
+import time
+from collections import defaultdict
+
 import sqlalchemy as sa
 from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
 from sqlalchemy.orm import Session, with_loader_criteria
 from sqlalchemy.orm.session import ORMExecuteState
 from sqlalchemy.orm.util import AliasedClass
 
+from app.support import metrics_helper, query_stats_helper
+from config.database import settings as db_settings
+
+# 编译缓存命中统计：语句名称 -> 计数（语句名称来自 execution_options(statement_name=...)，未命名的语句合并统计）
+_compile_cache_stats: dict[str, dict[str, int]] = defaultdict(lambda: {'hit': 0, 'miss': 0, 'uncached': 0})
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_compile_cache(conn, cursor, statement, parameters, context, executemany):
+    if context is None or context.compiled is None:
+        return
+
+    stats = _compile_cache_stats[context.execution_options.get('statement_name', '<unnamed>')]
+    if context.cache_hit is CACHE_HIT:
+        stats['hit'] += 1
+    elif context.cache_hit is CACHE_MISS:
+        stats['miss'] += 1
+    else:
+        stats['uncached'] += 1
+
+
+def _get_compile_cache_stats() -> dict:
+    return {
+        name: {**stats, 'hit_rate': round(stats['hit'] / total, 4) if (total := sum(stats.values())) else None}
+        for name, stats in _compile_cache_stats.items()
+    }
+
+
+metrics_helper.register_source('sql_compile_cache', _get_compile_cache_stats)
+
+
+# 语句耗时统计：规范化后的语句 -> 耗时直方图（毫秒）
+_statement_latency: dict[str, metrics_helper.Histogram] = {}
+_slow_query_count = 0
+
+_PLACEHOLDER_RE = re.compile(r'\$\d+|%\(\w+\)s')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r'\?(?:::[\w ]+)?(?:, \?(?:::[\w ]+)?)+')
+_VALUES_LIST_RE = re.compile(r'(\([^()]*\))(?:, \1)+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """规范化 SQL 语句：统一占位符、替换字面量、合并 IN 列表和多行 VALUES，使同一形状的语句归为一类"""
+    statement = _WHITESPACE_RE.sub(' ', statement).strip()
+    statement = _LITERAL_RE.sub('?', statement)
+    statement = _PLACEHOLDER_RE.sub('?', statement)
+    statement = _PLACEHOLDER_LIST_RE.sub('?, ...', statement)
+    return _VALUES_LIST_RE.sub(r'\1, ...', statement)
+
+
+def _bind_shape(parameters, executemany: bool) -> str:
+    """参数的类型结构（不包含参数值，避免日志泄露数据）"""
+    if executemany:
+        return f'{len(parameters)} x {_bind_shape(parameters[0], False)}' if parameters else '[]'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    # 开始时间记在本次执行的上下文上，语句失败时随上下文一起丢弃
+    if context is not None:
+        context._statement_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_statement_latency(conn, cursor, statement, parameters, context, executemany):
+    start_time = getattr(context, '_statement_start_time', None)
+    if start_time is None:
+        return
+
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    normalized = normalize_statement(statement)
+    histogram = _statement_latency.get(normalized)
+    if histogram is None:
+        if len(_statement_latency) >= db_settings.SQL_MAX_TRACKED_STATEMENTS:
+            normalized = '<other>'
+        histogram = _statement_latency.setdefault(normalized, metrics_helper.Histogram())
+    histogram.observe(duration_ms)
+    query_stats_helper.record(normalized, duration_ms)
+
+    if duration_ms >= db_settings.SQL_SLOW_QUERY_MS:
+        global _slow_query_count
+        _slow_query_count += 1
+        message = f'Slow query ({duration_ms:.1f}ms, params {_bind_shape(parameters, executemany)}): {normalized}'
+        if db_settings.SQL_SLOW_QUERY_EXPLAIN and not executemany and _is_plain_select(statement):
+            message += '\n' + _explain_analyze(conn, statement, parameters)
+        logging.warning(message)
+
+
+def _is_plain_select(statement: str) -> bool:
+    statement = statement.lstrip().upper()
+    return statement.startswith('SELECT') and ' FOR UPDATE' not in statement and ' FOR SHARE' not in statement
+
+
+def _explain_analyze(conn: sa.Connection, statement: str, parameters) -> str:
+    """对慢查询再执行一次 EXPLAIN (ANALYZE, BUFFERS)
+
+    EXPLAIN ANALYZE 会真正执行语句，SELECT 中也可能调用有副作用的函数，因此只在调用方的事务中、
+    于保存点内以只读模式执行，结束后总是回滚到保存点，不影响调用方的事务。
+    直接使用 DBAPI 游标执行（不触发引擎事件）；不在事务中（如 AUTOCOMMIT 连接）时跳过。
+    """
+    if not conn.in_transaction() or getattr(conn.connection.dbapi_connection, 'autocommit', False):
+        return 'EXPLAIN skipped: not in a transaction'
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT sql_explain')
+    except Exception as e:
+        cursor.close()
+        return f'EXPLAIN failed: {e}'
+
+    try:
+        # 只读模式下写表、DDL、nextval 等都会报错，保存点回滚后恢复为原来的读写模式
+        cursor.execute('SET LOCAL transaction_read_only = on')
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+    finally:
+        try:
+            cursor.execute('ROLLBACK TO SAVEPOINT sql_explain')
+            cursor.execute('RELEASE SAVEPOINT sql_explain')
+        except Exception as e:
+            logging.warning(f'Failed to roll back the EXPLAIN savepoint: {e}')
+        finally:
+            cursor.close()
+
+
+def _get_statement_latency_stats() -> dict:
+    statements = sorted(_statement_latency.items(), key=lambda item: item[1].sum, reverse=True)
+    return {
+        'slow_queries': _slow_query_count,
+        'statements': {statement: histogram.snapshot() for statement, histogram in statements},
+    }
+
+
+metrics_helper.register_source('sql_statements', _get_statement_latency_stats)
+
 
 # @event.listens_for(Session, 'do_orm_execute')
 # def add_soft_delete_filter(execute_state: ORMExecuteState):
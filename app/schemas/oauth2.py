@@ -23,3 +23,15 @@ class OAuth2CellphoneSc(BaseSc):
     scope: str = Field('', description='授权范围')
     client_id: str | None = Field(None, description='客户端ID')
     client_secret: str | None = Field(None, description='客户端密钥')
+
+
+class OAuth2RefreshTokenSc(BaseSc):
+    """OAuth2 刷新令牌请求"""
+
+    grant_type: str = Field(
+        'refresh_token', description='授权类型', pattern='^refresh_token$', example='refresh_token'
+    )
+    refresh_token: str = Field(description='刷新令牌')
+    scope: str = Field('', description='授权范围')
+    client_id: str | None = Field(None, description='客户端ID')
+    client_secret: str | None = Field(None, description='客户端密钥')
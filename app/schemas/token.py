@@ -4,6 +4,8 @@ from uuid import UUID
 from pydantic import Field
 
 from app.schemas.base import BaseSc
+from app.types import USER_STATE_TYPE
+from config.auth import settings
 
 
 class TokenSc(BaseSc):
@@ -12,6 +14,8 @@ class TokenSc(BaseSc):
     token_type: str = Field('bearer', description='令牌类型')
     expires_in: int = Field(description='过期时间（秒）')
     access_token: str = Field(description='令牌')
+    refresh_token: str | None = Field(None, description='刷新令牌')
+    refresh_expires_in: int | None = Field(None, description='刷新令牌过期时间（秒）')
 
 
 class TokenStatusSc(BaseSc):
@@ -21,3 +25,33 @@ class TokenStatusSc(BaseSc):
     expires_at: datetime.datetime = Field(description='过期时间')
     issued_at: datetime.datetime = Field(description='签发时间')
     is_valid: bool = Field(description='是否有效')
+
+
+class TokenIntrospectReqSc(BaseSc):
+    """批量令牌检查请求"""
+
+    tokens: list[str] = Field(
+        min_length=1, max_length=settings.INTROSPECTION_MAX_TOKENS, description='待检查的访问令牌列表'
+    )
+
+
+class TokenIntrospectionSc(BaseSc):
+    """单个令牌的检查结果（字段参考 RFC 7662，时间为 Unix 时间戳）"""
+
+    active: bool = Field(description='令牌当前是否有效')
+    sub: str | None = Field(None, description='主题（用户ID）')
+    exp: int | None = Field(None, description='过期时间')
+    iat: int | None = Field(None, description='签发时间')
+    jti: str | None = Field(None, description='令牌唯一标识')
+    iss: str | None = Field(None, description='发行者')
+    aud: str | None = Field(None, description='接收方')
+    token_type: str | None = Field(None, description='令牌类型')
+    state: USER_STATE_TYPE | None = Field(None, description='签发时的用户状态')
+    is_admin: bool | None = Field(None, description='签发时是否为管理员')
+    cache_ttl: int = Field(description='调用方可缓存此结果的时间（秒）')
+
+
+class TokenIntrospectRespSc(BaseSc):
+    """批量令牌检查结果（与请求中的令牌一一对应）"""
+
+    results: list[TokenIntrospectionSc] = Field(description='检查结果')
@@ -1,7 +1,10 @@
+import datetime
+from uuid import UUID
+
 from pydantic import Field
 
 from app.schemas.base import BaseSc
-from app.types import GENDER_TYPE
+from app.types import GENDER_TYPE, USER_STATE_TYPE
 
 
 class UserCreateReqSc(BaseSc):
@@ -13,3 +16,26 @@ class UserCreateReqSc(BaseSc):
     gender: GENDER_TYPE = Field(description='性别', example='male')
     cellphone: str = Field(description='手机号', example='12345678901')
     cellphone_verification_code: str = Field(description='手机号验证码', example='123456')
+
+
+class UserListItemSc(BaseSc):
+    """用户列表项"""
+
+    id: UUID = Field(description='用户ID')
+    username: str = Field(description='用户名')
+    nickname: str = Field(description='昵称')
+    cellphone: str | None = Field(None, description='手机号')
+    state: USER_STATE_TYPE = Field(description='用户状态')
+    gender: GENDER_TYPE = Field(description='性别')
+    avatar: str = Field(description='头像路径')
+    is_admin: bool = Field(description='是否管理员')
+    created_at: datetime.datetime = Field(description='创建时间')
+
+
+class UserPageSc(BaseSc):
+    """用户列表分页结果"""
+
+    items: list[UserListItemSc] = Field(description='用户列表')
+    next_cursor: str | None = Field(None, description='下一页游标，为空表示没有更多数据')
+    total: int | None = Field(None, description='总数（默认为估算值）')
+    total_is_exact: bool = Field(description='总数是否为精确值')
@@ -1,11 +1,13 @@
 #
 # OAuth2 授权业务逻辑
 #
-# 实现用户名密码授权和手机号授权的业务逻辑，包括用户验证和令牌颁发。
+# 实现用户名密码授权、手机号授权和刷新令牌授权的业务逻辑，包括用户验证和令牌颁发。
 #
 
+import logging
 import random
 import string
+from uuid import UUID
 
 from pydantic import ConfigDict, validate_call
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,16 +15,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.exceptions import (
     InvalidCellphoneCodeError,
     InvalidPasswordError,
+    InvalidTokenError,
     InvalidUserError,
     InvalidVerificationCodeError,
+    ServerBusyError,
     UsernameAlreadyExistsError,
     UserNotFoundError,
 )
 from app.models.user import UserModel
-from app.schemas.oauth2 import OAuth2CellphoneSc, OAuth2PasswordSc
+from app.schemas.oauth2 import OAuth2CellphoneSc, OAuth2PasswordSc, OAuth2RefreshTokenSc
 from app.schemas.user import UserCreateReqSc
-from app.services.auth import verification_code_service
-from app.services.auth.token_service import create_token_response_from_user
+from app.services.auth import login_throttle_service, user_cache_service, verification_code_service
+from app.services.auth.token_service import create_token_response_from_user, rotate_refresh_token
 from app.services.auth.user_service import create_user
 from app.support import password_helper
 
@@ -32,28 +36,45 @@ class PasswordGrant:
 
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def __init__(self, session: AsyncSession, client_ip: str, request_data: OAuth2PasswordSc):
+        self.is_password_rehashed = False  # 标记是否按当前成本重新计算了密码哈希
         self.session = session
         self.client_ip = client_ip
         self.request_data = request_data
 
     async def respond(self):
-        user = await UserModel.get_one(
-            self.session,
-            ((UserModel.username == self.request_data.username) | (UserModel.cellphone == self.request_data.username))
-            & UserModel.exist_filter(),
-        )
+        username = self.request_data.username
+
+        # 登录失败次数过多时直接拒绝，不再查询用户和校验密码
+        await login_throttle_service.check(username, self.client_ip)
+
+        user = await UserModel.get_by_account(self.session, username)
         if not user:
+            await login_throttle_service.record_failure(username, self.client_ip)
             raise UserNotFoundError()
 
         # 用户密码校验
-        if not (user.password and password_helper.verify_password(self.request_data.password, user.password)):
+        if not (user.password and await password_helper.averify_password(self.request_data.password, user.password)):
+            await login_throttle_service.record_failure(username, self.client_ip)
             raise InvalidPasswordError()
 
+        await login_throttle_service.record_success(username)
+
         # 用户状态校验
         if not user.is_enabled():
             raise InvalidUserError()
 
-        return create_token_response_from_user(user)
+        # 已存储的哈希成本与当前不符时，借助明文密码透明地重新计算
+        # 重算只是顺带的优化：线程池繁忙或执行失败时保留原哈希，不影响本次登录
+        if password_helper.needs_rehash(user.password):
+            try:
+                user.password = await password_helper.aget_password_hash(self.request_data.password)
+                self.is_password_rehashed = True
+            except ServerBusyError:
+                logging.info(f'Password rehash skipped for user {user.id}: hash executor is busy')
+            except Exception as e:
+                logging.warning(f'Password rehash failed for user {user.id}: {e!r}')
+
+        return await create_token_response_from_user(user)
 
 
 class CellphoneGrant:
@@ -74,7 +95,7 @@ class CellphoneGrant:
         except InvalidVerificationCodeError:
             raise InvalidCellphoneCodeError()
 
-        user = await UserModel.get_one(self.session, (UserModel.cellphone == cellphone) & UserModel.exist_filter())
+        user = await UserModel.get_one_by(self.session, cellphone=cellphone)
         while not user:
             try:
                 # 创建一个用户名（随机 10 位数字或字母组合）
@@ -100,4 +121,31 @@ class CellphoneGrant:
         if not user.is_enabled():
             raise InvalidUserError()
 
-        return create_token_response_from_user(user)
+        return await create_token_response_from_user(user)
+
+
+class RefreshTokenGrant:
+    """刷新令牌授权
+
+    刷新令牌只能使用一次，换取新的访问令牌和同一家族的新刷新令牌。
+    """
+
+    def __init__(self, request_data: OAuth2RefreshTokenSc):
+        self.request_data = request_data
+
+    async def respond(self):
+        record = await rotate_refresh_token(self.request_data.refresh_token)
+
+        try:
+            user_id = UUID(record['user_id'])
+        except ValueError:
+            raise InvalidTokenError()
+
+        # 用户状态校验（用户快照已排除删除的用户）
+        user = await user_cache_service.get_user_snapshot(user_id)
+        if not user:
+            raise UserNotFoundError()
+        if not user.is_enabled():
+            raise InvalidUserError()
+
+        return await create_token_response_from_user(user, refresh_token_family=record['family'])
@@ -0,0 +1,73 @@
+#
+# 登录限制服务
+#
+# 按用户名和客户端 IP 统计滑动窗口内的登录失败次数，超出阈值后按指数退避锁定。
+# 锁定检查在查询用户和校验密码之前进行，被拒绝的请求只需一次 Redis 往返。
+#
+
+import time
+import uuid
+from math import ceil
+
+from app.exceptions import TooManyRequestsError
+from app.providers.database_provider import redis_client
+from config.auth import settings
+from config.redis_key import settings as redis_key_settings
+
+
+def _subjects(username: str, client_ip: str) -> list[tuple[str, int]]:
+    """返回 (主体标识, 失败次数阈值) 列表"""
+    return [
+        (f'user:{username}', settings.LOGIN_MAX_FAILURES_PER_USERNAME),
+        (f'ip:{client_ip}', settings.LOGIN_MAX_FAILURES_PER_IP),
+    ]
+
+
+async def check(username: str, client_ip: str):
+    """检查用户名或 IP 是否处于锁定状态
+
+    Raises:
+        TooManyRequestsError: 处于锁定状态，Retry-After 为剩余锁定秒数
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for subject, _ in _subjects(username, client_ip):
+            pipe.pttl(f'{redis_key_settings.LOGIN_LOCKOUT}:{subject}')
+        pttls = await pipe.execute()
+
+    remaining = max(pttls)
+    if remaining > 0:
+        raise TooManyRequestsError(headers={'Retry-After': str(ceil(remaining / 1000))})
+
+
+async def record_failure(username: str, client_ip: str):
+    """记录一次登录失败，超出阈值时锁定对应的用户名或 IP"""
+    now = time.time()
+    window = settings.LOGIN_FAILURE_WINDOW
+    subjects = _subjects(username, client_ip)
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for subject, _ in subjects:
+            key = f'{redis_key_settings.LOGIN_FAILURES}:{subject}'
+            pipe.zadd(key, {f'{now}:{uuid.uuid4().hex[:8]}': now})
+            pipe.zremrangebyscore(key, '-inf', now - window)
+            pipe.zcard(key)
+            pipe.expire(key, window)
+        results = await pipe.execute()
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for i, (subject, max_failures) in enumerate(subjects):
+            failures = results[i * 4 + 2]
+            if failures >= max_failures:
+                lockout = min(
+                    settings.LOGIN_LOCKOUT_BASE * 2 ** (failures - max_failures), settings.LOGIN_LOCKOUT_MAX
+                )
+                pipe.set(f'{redis_key_settings.LOGIN_LOCKOUT}:{subject}', failures, ex=lockout)
+        await pipe.execute()  # 没有需要锁定的主体时不会发出请求
+
+
+async def record_success(username: str):
+    """登录成功后清除该用户名的失败记录（IP 的记录保留）"""
+    subject = f'user:{username}'
+    await redis_client.delete(
+        f'{redis_key_settings.LOGIN_FAILURES}:{subject}', f'{redis_key_settings.LOGIN_LOCKOUT}:{subject}'
+    )
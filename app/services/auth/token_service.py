@@ -3,40 +3,460 @@
 #
 # 提供令牌的创建、验证和吊销功能，管理令牌的生命周期和状态。
 #
+# 吊销记录以 jti 为成员、过期时间为分值存放在 Redis 有序集合中；
+# 每个 worker 维护一份已吊销 jti 的布隆过滤器，只有过滤器命中时才查询 Redis。
+#
+# 每个用户另有一个令牌代数（gen），签发时写入声明；代数加一即可吊销该用户此前签发的全部令牌。
+# 各 worker 缓存用户的当前代数，并通过广播及时更新。
+#
+# 刷新令牌为随机串，以摘要为键存放在 Redis 中，每次使用后轮换；同一登录产生的刷新令牌属于同一“家族”，
+# 已轮换的刷新令牌被再次使用时，视为泄露并吊销整个家族。
+# 启用 JWT_STATELESS_ACCESS_TOKEN 时（默认关闭），访问令牌只做签名和声明校验，吊销检查移到刷新环节，
+# 注销与吊销对已签发的访问令牌要到其过期后才生效；管理员接口等必须实时生效的调用方传入 strict=True。
+#
+# 网关可通过 introspect_tokens 批量检查令牌：本地解码后，用一次流水线查询所有本地无法确定的状态。
+#
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import secrets
+import time
+import uuid
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
 
-from datetime import datetime, timedelta, timezone
+from jose import JWTError
+from pydantic import ValidationError as PydanticValidationError
 
 from app.exceptions import InvalidTokenError
 from app.models.user import UserModel
+from app.providers import broadcast_provider
 from app.providers.database_provider import redis_client
 from app.schemas.jwt import JWTSc
-from app.schemas.token import TokenSc
-from app.support import jwt_helper
+from app.schemas.token import TokenIntrospectionSc, TokenSc
+from app.support import jwt_helper, metrics_helper
+from app.support.bloom_helper import BloomFilter
+from app.support.cache_helper import TTLCache
+from app.types import USER_STATE_TYPE
 from config.auth import settings
 from config.redis_key import settings as redis_key_settings
 
+if TYPE_CHECKING:
+    from app.services.auth.user_cache_service import UserSnapshot
+
+
+@dataclass(frozen=True, slots=True)
+class AuthPrincipal:
+    """仅由已验证的 JWT 声明构成的认证主体（不查询数据库）"""
+
+    sub: str
+    jti: str
+    exp: datetime.datetime
+    iat: datetime.datetime
+    state: USER_STATE_TYPE | None = None  # 签发时的用户状态（旧令牌没有此声明）
+    is_admin: bool = False  # 签发时是否为管理员
+    gen: int = 0  # 签发时的用户令牌代数
+    claims: dict[str, Any] = field(default_factory=dict)  # 其他私有声明
+
+    @property
+    def user_id(self) -> UUID:
+        return UUID(self.sub)
+
+    @classmethod
+    def from_payload(cls, payload: JWTSc) -> 'AuthPrincipal':
+        claims = dict(payload.model_extra or {})
+        return cls(
+            sub=payload.sub,
+            jti=payload.jti,
+            exp=payload.exp,
+            iat=payload.iat,
+            state=claims.pop('state', None),
+            is_admin=bool(claims.pop('is_admin', False)),
+            gen=int(claims.pop('gen', 0)),
+            claims=claims,
+        )
+
 
-def create_token_response_from_user(user: UserModel) -> TokenSc:
-    """根据用户模型创建令牌响应"""
-    expires_delta = timedelta(minutes=settings.JWT_TTL)
+# 本 worker 已知的令牌吊销状态：jti -> 是否已吊销（仅在布隆过滤器命中时使用）
+_revocation_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+# 已吊销 jti 的布隆过滤器，None 表示尚未加载（此时直接查询 Redis）
+_revoked_filter: BloomFilter | None = None
+_rebuild_task: asyncio.Task | None = None
+_rebuild_pending: set[str] | None = None  # 重建期间收到的吊销广播
+_legacy_migrated = False
+
+_REBUILD_RETRY_DELAY = 5  # 重建失败后的重试间隔（秒）
+
+# 本 worker 已知的用户令牌代数：user_id(str) -> gen
+_generation_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.TOKEN_GENERATION_CACHE_TTL)
+
+# 原子地消费刷新令牌：取出记录并删除，同时写入“已使用”标记（沿用原令牌的剩余有效期）。
+# 令牌不存在时返回已使用标记中的家族，用于重用检测。
+# KEYS[1] 刷新令牌键，KEYS[2] 已使用标记键；返回 {记录或 nil, 已使用标记或 nil}
+_consume_refresh_token = redis_client.register_script(
+    """
+    local value = redis.call('GET', KEYS[1])
+    if not value then
+        return {false, redis.call('GET', KEYS[2])}
+    end
+    local ttl = redis.call('TTL', KEYS[1])
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[2], cjson.decode(value)['family'], 'EX', math.max(ttl, 1))
+    return {value, false}
+    """
+)
+
+
+async def create_token_response_from_user(
+    user: 'UserModel | UserSnapshot', refresh_token_family: str = None
+) -> TokenSc:
+    """根据用户创建令牌响应（访问令牌 + 刷新令牌）
+
+    Args:
+        user: 用户模型或用户快照
+        refresh_token_family: 刷新令牌所属家族，轮换时沿用，为 None 时创建新家族
+    """
+    expires_delta = datetime.timedelta(minutes=settings.JWT_TTL)
     expires_in = int(expires_delta.total_seconds())
-    token = jwt_helper.create_access_token(user.id, expires_delta=expires_delta)
+    gen = await get_token_generation(str(user.id))
+    # 嵌入常用的用户属性，供 get_auth_claims 在不查询数据库的情况下鉴权
+    additional_claims = {'state': user.state, 'is_admin': user.is_admin, 'gen': gen}
+    token = jwt_helper.create_access_token(user.id, expires_delta=expires_delta, additional_claims=additional_claims)
 
-    return TokenSc(token_type='bearer', expires_in=expires_in, access_token=token)
+    refresh_token = await _issue_refresh_token(str(user.id), gen, refresh_token_family)
 
+    return TokenSc(
+        token_type='bearer',
+        expires_in=expires_in,
+        access_token=token,
+        refresh_token=refresh_token,
+        refresh_expires_in=settings.JWT_REFRESH_TTL * 60,
+    )
 
-async def validate_token(token: str) -> JWTSc:
-    """验证 token 并返回解码后的数据"""
-    value = await redis_client.get(f'{redis_key_settings.VERIFY_GRANT_TOKEN}:{token}')
-    if value and value == 'invalid':
-        raise InvalidTokenError()
 
+async def validate_token(token: str, strict: bool = False) -> JWTSc:
+    """验证 token 并返回解码后的数据
+
+    Args:
+        token: 访问令牌
+        strict: 为 True 时即使启用了 JWT_STATELESS_ACCESS_TOKEN 也检查吊销状态
+    """
     payload = jwt_helper.get_payload_by_token(token)
+    if settings.JWT_STATELESS_ACCESS_TOKEN and not strict:
+        return payload
+
+    await check_token_state(payload)
     return payload
 
 
+async def check_token_state(payload: JWTSc):
+    """检查已解码令牌的吊销状态（jti 吊销与用户令牌代数）
+
+    Raises:
+        InvalidTokenError: 令牌已被吊销
+    """
+    if await _is_revoked(payload.jti, payload.exp.timestamp()):
+        raise InvalidTokenError()
+
+    # 旧令牌没有 gen 声明，视为第 0 代
+    gen = int((payload.model_extra or {}).get('gen', 0))
+    if gen < await get_token_generation(payload.sub):
+        raise InvalidTokenError()
+
+
 async def cancel_token(token: str):
     """吊销一个 token"""
-    payload = await validate_token(token)
-    expire_in = int(payload.exp.timestamp() - datetime.now(timezone.utc).timestamp())
-    await redis_client.setex(name=f'{redis_key_settings.VERIFY_GRANT_TOKEN}:{token}', time=expire_in, value='invalid')
+    payload = jwt_helper.get_payload_by_token(token)
+    await check_token_state(payload)
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zadd(redis_key_settings.REVOKED_TOKEN_JTI, {payload.jti: payload.exp.timestamp()})
+        pipe.zremrangebyscore(redis_key_settings.REVOKED_TOKEN_JTI, '-inf', time.time())  # 顺带清理已过期的记录
+        await pipe.execute()
+
+    # 通知所有 worker（包括自身）更新布隆过滤器
+    _on_token_revoked(payload.jti)
+    await broadcast_provider.publish(redis_key_settings.CHANNEL_TOKEN_REVOKED, payload.jti)
+
+
+async def introspect_tokens(tokens: list[str]) -> list[TokenIntrospectionSc]:
+    """批量检查访问令牌的状态（RFC 7662 风格，始终检查吊销状态）
+
+    先在本地逐个解码，再用一次流水线（ZMSCORE + HMGET）查询本地缓存无法确定的 jti 吊销状态与用户令牌代数。
+    有效令牌的 cache_ttl 为网关可缓存该结果的秒数（距过期时间留出 INTROSPECTION_CACHE_LEEWAY）。
+    """
+    payloads: list[JWTSc | None] = []
+    for token in tokens:
+        try:
+            payloads.append(jwt_helper.get_payload_by_token(token))
+        except (JWTError, PydanticValidationError):
+            payloads.append(None)
+
+    revoked: dict[str, bool] = {}
+    generations: dict[str, int] = {}
+    unknown_jtis: dict[str, float] = {}  # jti -> exp
+    unknown_user_ids: set[str] = set()
+    revoked_filter = _revoked_filter
+    for payload in payloads:
+        if payload is None:
+            continue
+
+        if payload.jti not in revoked and payload.jti not in unknown_jtis:
+            if revoked_filter is not None and payload.jti not in revoked_filter:
+                revoked[payload.jti] = False
+            elif (cached := _revocation_cache.get(payload.jti)) is not None:
+                revoked[payload.jti] = cached
+            else:
+                unknown_jtis[payload.jti] = payload.exp.timestamp()
+
+        if payload.sub is not None and payload.sub not in generations:
+            if (gen := _generation_cache.get(payload.sub)) is not None:
+                generations[payload.sub] = gen
+            else:
+                unknown_user_ids.add(payload.sub)
+
+    if unknown_jtis or unknown_user_ids:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            if unknown_jtis:
+                pipe.zmscore(redis_key_settings.REVOKED_TOKEN_JTI, list(unknown_jtis))
+            if unknown_user_ids:
+                pipe.hmget(redis_key_settings.TOKEN_GENERATION, list(unknown_user_ids))
+            results = iter(await pipe.execute())
+
+        if unknown_jtis:
+            for (jti, exp), score in zip(unknown_jtis.items(), next(results)):
+                revoked[jti] = score is not None
+                _cache_revocation(jti, revoked[jti], exp)
+        if unknown_user_ids:
+            for user_id, gen in zip(unknown_user_ids, next(results)):
+                generations[user_id] = _cache_generation(user_id, int(gen or 0))
+
+    now = time.time()
+    positive_ttl_cap = None if settings.JWT_STATELESS_ACCESS_TOKEN else settings.TOKEN_CACHE_TTL
+    introspections = []
+    for payload in payloads:
+        if payload is None:
+            introspections.append(TokenIntrospectionSc(active=False, cache_ttl=0))
+            continue
+
+        expire_in = max(0, int(payload.exp.timestamp() - now))
+        gen = int((payload.model_extra or {}).get('gen', 0))
+        active = (
+            expire_in > 0
+            and payload.sub is not None
+            and not revoked[payload.jti]
+            and gen >= generations[payload.sub]
+        )
+        if active:
+            cache_ttl = max(0, expire_in - settings.INTROSPECTION_CACHE_LEEWAY)
+            if positive_ttl_cap is not None:
+                cache_ttl = min(cache_ttl, positive_ttl_cap)
+        else:
+            cache_ttl = expire_in  # 已吊销的令牌不会恢复有效，可缓存到过期
+
+        introspections.append(
+            TokenIntrospectionSc(
+                active=active,
+                sub=payload.sub,
+                exp=int(payload.exp.timestamp()),
+                iat=int(payload.iat.timestamp()),
+                jti=payload.jti,
+                iss=payload.iss,
+                aud=payload.aud,
+                token_type='access_token',
+                state=(payload.model_extra or {}).get('state'),
+                is_admin=bool((payload.model_extra or {}).get('is_admin', False)),
+                cache_ttl=cache_ttl,
+            )
+        )
+    return introspections
+
+
+async def rotate_refresh_token(refresh_token: str) -> dict[str, Any]:
+    """消费一个刷新令牌，返回其记录（user_id、gen、family），调用方应随后签发同一家族的新令牌
+
+    Raises:
+        InvalidTokenError: 刷新令牌无效、已过期、已被吊销，或已轮换后被重复使用
+    """
+    digest = _refresh_token_digest(refresh_token)
+    token_key = f'{redis_key_settings.REFRESH_TOKEN}:{digest}'
+    used_key = f'{redis_key_settings.REFRESH_TOKEN_USED}:{digest}'
+
+    value, used_family = await _consume_refresh_token(keys=[token_key, used_key])
+
+    if value is None:
+        if used_family:
+            # 已轮换的刷新令牌被再次使用，可能已泄露：吊销整个家族
+            logging.warning(f'Refresh token reuse detected, revoking family {used_family}')
+            await redis_client.delete(f'{redis_key_settings.REFRESH_TOKEN_FAMILY}:{used_family}')
+        raise InvalidTokenError()
+
+    record = json.loads(value)
+    family_exists = await redis_client.exists(f'{redis_key_settings.REFRESH_TOKEN_FAMILY}:{record["family"]}')
+    if not family_exists or record['gen'] < await get_token_generation(record['user_id']):
+        raise InvalidTokenError()
+    return record
+
+
+async def revoke_refresh_token(refresh_token: str):
+    """吊销刷新令牌所在的整个家族（退出登录时调用）"""
+    value = await redis_client.get(f'{redis_key_settings.REFRESH_TOKEN}:{_refresh_token_digest(refresh_token)}')
+    if value is not None:
+        await redis_client.delete(f'{redis_key_settings.REFRESH_TOKEN_FAMILY}:{json.loads(value)["family"]}')
+
+
+async def _issue_refresh_token(user_id: str, gen: int, family: str = None) -> str:
+    """签发刷新令牌，并延长家族的有效期"""
+    refresh_token = secrets.token_urlsafe(32)
+    family = family or uuid.uuid4().hex
+    ttl = settings.JWT_REFRESH_TTL * 60
+    record = json.dumps({'user_id': user_id, 'gen': gen, 'family': family})
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(f'{redis_key_settings.REFRESH_TOKEN}:{_refresh_token_digest(refresh_token)}', record, ex=ttl)
+        pipe.set(f'{redis_key_settings.REFRESH_TOKEN_FAMILY}:{family}', user_id, ex=ttl)
+        await pipe.execute()
+    return refresh_token
+
+
+def _refresh_token_digest(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+
+async def get_token_generation(user_id: str) -> int:
+    """获取用户当前的令牌代数"""
+    gen = _generation_cache.get(user_id)
+    if gen is None:
+        gen = await redis_client.hget(redis_key_settings.TOKEN_GENERATION, user_id)
+        gen = _cache_generation(user_id, int(gen or 0))
+    return gen
+
+
+def _cache_generation(user_id: str, gen: int) -> int:
+    """缓存从 Redis 读取的代数（查询期间可能已收到更新的广播，取较大者）"""
+    gen = max(gen, _generation_cache.get(user_id, 0, record=False))
+    _generation_cache.set(user_id, gen)
+    return gen
+
+
+async def revoke_user_tokens(user_id: str) -> int:
+    """吊销用户此前签发的全部令牌（如修改密码、禁用账号时调用）
+
+    Returns:
+        int: 新的令牌代数
+    """
+    gen = await redis_client.hincrby(redis_key_settings.TOKEN_GENERATION, user_id, 1)
+    _on_generation_changed(f'{user_id}:{gen}')
+    await broadcast_provider.publish(redis_key_settings.CHANNEL_TOKEN_GENERATION, f'{user_id}:{gen}')
+    return gen
+
+
+def _on_generation_changed(message: str):
+    """收到代数更新广播：message 格式为 user_id:gen"""
+    user_id, gen = message.rsplit(':', 1)
+    _generation_cache.set(user_id, max(int(gen), _generation_cache.get(user_id, 0, record=False)))
+
+
+async def _is_revoked(jti: str, exp: float) -> bool:
+    """判断 jti 是否已被吊销"""
+    revoked_filter = _revoked_filter
+    if revoked_filter is not None and jti not in revoked_filter:
+        return False
+
+    revoked = _revocation_cache.get(jti)
+    if revoked is None:
+        revoked = await redis_client.zscore(redis_key_settings.REVOKED_TOKEN_JTI, jti) is not None
+        _cache_revocation(jti, revoked, exp)
+    return revoked
+
+
+def _cache_revocation(jti: str, revoked: bool, exp: float):
+    """缓存从 Redis 读取的吊销状态：已吊销的状态不会再变化，可一直缓存到令牌过期；有效状态只缓存较短时间"""
+    expire_in = exp - time.time()
+    _revocation_cache.set(jti, revoked, ttl=expire_in if revoked else min(expire_in, settings.TOKEN_CACHE_TTL))
+
+
+def _on_token_revoked(jti: str):
+    """收到吊销广播：更新本地过滤器与缓存"""
+    _revocation_cache.pop(jti)
+    if _rebuild_pending is not None:
+        _rebuild_pending.add(jti)
+    if _revoked_filter is not None:
+        _revoked_filter.add(jti)
+        if _revoked_filter.is_saturated():
+            _schedule_rebuild()
+
+
+def _on_broadcast_reset():
+    """订阅（重新）建立：期间可能遗漏了广播，丢弃本地状态并重建"""
+    global _revoked_filter
+    _revocation_cache.clear()
+    _revoked_filter = None
+    _schedule_rebuild()
+
+
+def _schedule_rebuild():
+    global _rebuild_task
+    if _rebuild_task is None or _rebuild_task.done():
+        _rebuild_task = asyncio.create_task(_rebuild_revoked_filter())
+
+
+async def _rebuild_revoked_filter():
+    """从 Redis 重建已吊销 jti 的布隆过滤器"""
+    global _revoked_filter, _rebuild_pending, _legacy_migrated
+    _rebuild_pending = set()
+    try:
+        while True:
+            try:
+                if not _legacy_migrated:
+                    await _migrate_legacy_revocations()
+                    _legacy_migrated = True
+
+                await redis_client.zremrangebyscore(redis_key_settings.REVOKED_TOKEN_JTI, '-inf', time.time())
+                jtis = await redis_client.zrange(redis_key_settings.REVOKED_TOKEN_JTI, 0, -1)
+
+                revoked_filter = BloomFilter(
+                    capacity=max(settings.TOKEN_BLOOM_CAPACITY, len(jtis) * 2),
+                    error_rate=settings.TOKEN_BLOOM_ERROR_RATE,
+                )
+                for jti in chain(jtis, _rebuild_pending):
+                    revoked_filter.add(jti)
+                _revoked_filter = revoked_filter
+                logging.info(f'Revoked token filter rebuilt with {revoked_filter.count} entries')
+                return
+            except Exception as e:
+                logging.error(f'Failed to rebuild revoked token filter: {e}')
+                await asyncio.sleep(_REBUILD_RETRY_DELAY)
+    finally:
+        _rebuild_pending = None
+
+
+async def _migrate_legacy_revocations():
+    """将旧版以完整令牌为键的吊销记录迁移到 jti 有序集合"""
+    prefix = f'{redis_key_settings.VERIFY_GRANT_TOKEN}:'
+    async for key in redis_client.scan_iter(match=f'{prefix}*', count=1000):
+        try:
+            payload = jwt_helper.get_payload_by_token(key[len(prefix) :])
+            await redis_client.zadd(redis_key_settings.REVOKED_TOKEN_JTI, {payload.jti: payload.exp.timestamp()})
+        except Exception:
+            pass  # 已过期或无法解析的令牌无需迁移
+        await redis_client.delete(key)
+
+
+def _get_filter_stats() -> dict | None:
+    return _revoked_filter.stats() if _revoked_filter is not None else None
+
+
+broadcast_provider.subscribe(redis_key_settings.CHANNEL_TOKEN_REVOKED, _on_token_revoked)
+broadcast_provider.subscribe(redis_key_settings.CHANNEL_TOKEN_GENERATION, _on_generation_changed)
+broadcast_provider.on_reset(_on_broadcast_reset)
+broadcast_provider.on_reset(_generation_cache.clear)
+metrics_helper.register_source('token_revocation_cache', _revocation_cache.stats)
+metrics_helper.register_source('token_revocation_filter', _get_filter_stats)
+metrics_helper.register_source('token_generation_cache', _generation_cache.stats)
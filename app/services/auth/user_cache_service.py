@@ -0,0 +1,198 @@
+#
+# 认证用户缓存服务
+#
+# 在每个 worker 内缓存认证所需的用户只读快照，避免每个请求都查询数据库。
+# 同一用户的并发未命中合并为一次查询；用户数据变更提交后，通过广播让所有 worker 失效对应条目。
+# 用户被禁用或删除时，同时吊销其已签发的全部令牌。
+# 快照从只读副本加载；刚变更过的用户在复制延迟窗口内改从主库加载，避免缓存旧数据。
+#
+
+import asyncio
+import datetime
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.models.user import UserModel
+from app.providers import broadcast_provider
+from app.providers.database_provider import async_session_factory, use_primary
+from app.services.auth.token_service import revoke_user_tokens
+from app.support import metrics_helper
+from app.support.cache_helper import TTLCache
+from app.types import GENDER_TYPE, USER_STATE_TYPE
+from config.auth import settings
+from config.database import settings as db_settings
+from config.redis_key import settings as redis_key_settings
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """用户只读快照"""
+
+    id: UUID
+    username: str
+    nickname: str
+    cellphone: str | None
+    state: USER_STATE_TYPE
+    gender: GENDER_TYPE
+    avatar: str
+    is_admin: bool
+    created_at: datetime.datetime
+    deleted_at: datetime.datetime | None
+
+    @classmethod
+    def from_model(cls, user: UserModel) -> 'UserSnapshot':
+        return cls(
+            id=user.id,
+            username=user.username,
+            nickname=user.nickname,
+            cellphone=user.cellphone,
+            state=user.state,
+            gender=user.gender,
+            avatar=user.avatar,
+            is_admin=user.is_admin,
+            created_at=user.created_at,
+            deleted_at=user.deleted_at,
+        )
+
+    def is_archived(self) -> bool:
+        return self.deleted_at is not None and self.deleted_at <= datetime.datetime.now(datetime.timezone.utc)
+
+    def is_enabled(self) -> bool:
+        return self.state == 'enabled' and not self.is_archived()
+
+
+_NOT_FOUND = object()  # 缓存“用户不存在”的结果
+
+_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+_inflight: dict[UUID, asyncio.Task] = {}  # 正在加载的用户
+_recently_changed = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=db_settings.POSTGRES_REPLICA_MAX_LAG)
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def get_user_snapshot(user_id: UUID) -> UserSnapshot | None:
+    """获取用户快照（不存在或已删除时返回 None）"""
+    snapshot = _cache.get(user_id)
+    if snapshot is None:
+        task = _inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(_load_user_snapshot(user_id))
+            _inflight[user_id] = task
+            task.add_done_callback(lambda t: _inflight.pop(user_id, None) if _inflight.get(user_id) is t else None)
+        # shield: 单个请求被取消时不影响其他等待同一查询的请求
+        snapshot = await asyncio.shield(task)
+
+    return None if snapshot is _NOT_FOUND else snapshot
+
+
+async def invalidate_user(user_id: UUID):
+    """失效所有 worker 中该用户的快照（绕过 ORM 的批量更新后需手动调用）"""
+    _evict(str(user_id))
+    await broadcast_provider.publish(redis_key_settings.CHANNEL_USER_CHANGED, str(user_id))
+
+
+async def _load_user_snapshot(user_id: UUID):
+    async with async_session_factory() as session:
+        if _recently_changed.get(user_id, record=False):
+            use_primary(session)
+        user = await UserModel.get_one_by(session, id=user_id)
+    snapshot = UserSnapshot.from_model(user) if user else _NOT_FOUND
+
+    # 加载期间该用户已被失效时，不写入缓存
+    if _inflight.get(user_id) is asyncio.current_task():
+        _cache.set(user_id, snapshot)
+    return snapshot
+
+
+def _evict(user_id: str):
+    user_id = UUID(user_id)
+    _cache.pop(user_id)
+    _recently_changed.set(user_id, True)
+    _inflight.pop(user_id, None)
+
+
+@event.listens_for(UserModel, 'after_update')
+def _collect_updated_user(mapper, connection, target: UserModel):
+    """记录本次事务中变更的用户，提交后再广播"""
+    attrs = sa.inspect(target).attrs
+    state_changed = attrs.state.history.has_changes() or attrs.deleted_at.history.has_changes()
+    _collect_changed_user(target, deactivated=state_changed and not target.is_enabled())
+
+
+@event.listens_for(UserModel, 'after_delete')
+def _collect_deleted_user(mapper, connection, target: UserModel):
+    _collect_changed_user(target, deactivated=True)
+
+
+def _collect_changed_user(target: UserModel, deactivated: bool):
+    session = object_session(target)
+    if session is None:
+        return
+
+    _collect_changed_user_ids(session, [target.id], deactivated_user_ids=[target.id] if deactivated else [])
+
+
+def _collect_changed_user_ids(session: Session, user_ids: Iterable[UUID], deactivated_user_ids: Iterable[UUID]):
+    session.info.setdefault('changed_user_ids', set()).update(user_ids)
+    session.info.setdefault('deactivated_user_ids', set()).update(deactivated_user_ids)
+
+
+@UserModel.listen_bulk_write
+async def _collect_bulk_written_users(session: AsyncSession, user_ids: list[UUID], columns: set[str]):
+    """bulk_create、bulk_upsert 不触发 ORM 事件，同样在提交后失效快照；更新了状态时吊销已停用用户的令牌"""
+    deactivated_user_ids = []
+    if columns & {'state', 'deleted_at'}:
+        result = await session.scalars(
+            sa.select(UserModel.id).where(
+                UserModel.id == sa.any_(sa.bindparam('user_ids', type_=ARRAY(UserModel.id.type))),
+                sa.not_(sa.and_(UserModel.state == 'enabled', UserModel.exist_filter())),
+            ),
+            {'user_ids': user_ids},
+        )
+        deactivated_user_ids = result.all()
+    _collect_changed_user_ids(session.sync_session, user_ids, deactivated_user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changed_users(session: Session):
+    user_ids = session.info.pop('changed_user_ids', None)
+    deactivated_user_ids = session.info.pop('deactivated_user_ids', set())
+    if not user_ids:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # 不在事件循环中（如离线脚本），无需通知
+
+    for user_id in user_ids:
+        tasks = [loop.create_task(invalidate_user(user_id))]
+        if user_id in deactivated_user_ids:
+            tasks.append(loop.create_task(revoke_user_tokens(str(user_id))))
+        for task in tasks:
+            _background_tasks.add(task)
+            task.add_done_callback(_on_publish_done)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session: Session):
+    session.info.pop('changed_user_ids', None)
+    session.info.pop('deactivated_user_ids', None)
+
+
+def _on_publish_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logging.error(f'Failed to publish user change: {task.exception()}')
+
+
+broadcast_provider.subscribe(redis_key_settings.CHANNEL_USER_CHANGED, _evict)
+broadcast_provider.on_reset(_cache.clear)
+metrics_helper.register_source('user_snapshot_cache', _cache.stats)
@@ -1,20 +1,22 @@
 #
 # 用户管理服务
 #
-# 封装核心的用户管理业务逻辑，例如创建新用户。
+# 封装核心的用户管理业务逻辑，例如创建新用户、分页查询用户列表。
 #
 
+import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import UserModel
-from app.schemas.user import UserCreateReqSc
-from app.support import password_helper
+from app.schemas.user import UserCreateReqSc, UserListItemSc, UserPageSc
+from app.support import password_helper, query_helper
+from app.types import GENDER_TYPE, USER_STATE_TYPE
 
 
 async def create_user(session: AsyncSession, client_ip: str, new_user: UserCreateReqSc) -> UserModel:
     """创建用户"""
     if password := new_user.password:
-        password = password_helper.get_password_hash(password)
+        password = await password_helper.aget_password_hash(password)
 
     # 创建用户
     user = UserModel(
@@ -26,3 +28,76 @@ async def create_user(session: AsyncSession, client_ip: str, new_user: UserCreat
     await session.flush()
 
     return user
+
+
+async def list_users(
+    session: AsyncSession,
+    limit: int,
+    cursor: str = None,
+    keyword: str = None,
+    state: USER_STATE_TYPE = None,
+    gender: GENDER_TYPE = None,
+    is_admin: bool = None,
+    exact_count: bool = False,
+) -> UserPageSc:
+    """按创建时间倒序分页查询用户（keyset 分页，任意深度的翻页代价相同）
+
+    Args:
+        session: 数据库会话
+        limit: 每页数量
+        cursor: 上一页返回的游标，为空时从第一页开始
+        keyword: 按用户名、昵称、手机号模糊搜索（使用 trigram 索引）
+        state: 按用户状态筛选
+        gender: 按性别筛选
+        is_admin: 按是否管理员筛选
+        exact_count: 是否返回精确总数（否则为估算值，不扫描全表）
+    """
+    conditions = [UserModel.exist_filter()]
+    if keyword:
+        conditions.append(
+            sa.or_(
+                UserModel.username.icontains(keyword, autoescape=True),
+                UserModel.nickname.icontains(keyword, autoescape=True),
+                UserModel.cellphone.icontains(keyword, autoescape=True),
+            )
+        )
+    if state is not None:
+        conditions.append(UserModel.state == state)
+    if gender is not None:
+        conditions.append(UserModel.gender == gender)
+    if is_admin is not None:
+        conditions.append(UserModel.is_admin == is_admin)
+    has_filters = len(conditions) > 1
+
+    page_conditions = list(conditions)
+    if cursor:
+        created_at, user_id = query_helper.decode_cursor(cursor)
+        page_conditions.append(sa.tuple_(UserModel.created_at, UserModel.id) < sa.tuple_(created_at, user_id))
+
+    # 多取一条用于判断是否还有下一页
+    query = (
+        sa.select(UserModel)
+        .where(*page_conditions)
+        .order_by(UserModel.created_at.desc(), UserModel.id.desc())
+        .limit(limit + 1)
+    )
+    users = list(await session.scalars(query))
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = query_helper.encode_cursor(users[-1].created_at, users[-1].id)
+
+    count_query = sa.select(UserModel.id).where(*conditions)
+    if exact_count:
+        total = await session.scalar(sa.select(sa.func.count()).select_from(count_query.subquery()))
+    elif has_filters:
+        total = await query_helper.estimate_query_rows(session, count_query)
+    else:
+        total = await query_helper.estimate_table_rows(session, UserModel.__table__)
+
+    return UserPageSc(
+        items=[UserListItemSc.model_validate(user) for user in users],
+        next_cursor=next_cursor,
+        total=total,
+        total_is_exact=exact_count,
+    )
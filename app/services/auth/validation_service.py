@@ -32,16 +32,9 @@ async def validate_username_availability(session: AsyncSession, username: str, e
         InvalidUsernameError: 如果用户名包含无效字符
         UsernameAlreadyExistsError: 如果用户名或手机号已存在
     """
-    if not username:
-        raise UsernameEmptyError()
-
-    query = sa.select(sa.func.count()).where(
-        ((UserModel.username == username) | (UserModel.cellphone == username)) & UserModel.exist_filter()
-    )
-    if exclude_id:
-        query = query.where(UserModel.id != exclude_id)
-    result = await session.execute(query)
-    if result.scalar() > 0:
+    _check_username(username)
+    username_taken, _ = await _query_taken(session, username, None, exclude_id)
+    if username_taken:
         raise UsernameAlreadyExistsError()
 
 
@@ -58,15 +51,80 @@ async def validate_cellphone_availability(session: AsyncSession, cellphone: str,
         InvalidCellphoneError: 如果手机号格式无效
         CellphoneAlreadyExistsError: 如果手机号已存在
     """
+    _check_cellphone(cellphone)
+    _, cellphone_taken = await _query_taken(session, None, cellphone, exclude_id)
+    if cellphone_taken:
+        raise CellphoneAlreadyExistsError()
+
+
+async def validate_account_availability(session: AsyncSession, username: str, cellphone: str, exclude_id: int = None):
+    """同时验证用户名和手机号是否可用（只查询一次数据库）
+
+    Args:
+        session: 数据库会话
+        username: 用户名
+        cellphone: 手机号
+        exclude_id: 要排除的用户 ID
+
+    Raises:
+        UsernameEmptyError: 如果用户名为空
+        CellphoneEmptyError: 如果手机号为空
+        InvalidCellphoneError: 如果手机号格式无效
+        UsernameAlreadyExistsError: 如果用户名或手机号已存在
+        CellphoneAlreadyExistsError: 如果手机号已存在
+    """
+    _check_username(username)
+    _check_cellphone(cellphone)
+    username_taken, cellphone_taken = await _query_taken(session, username, cellphone, exclude_id)
+    if username_taken:
+        raise UsernameAlreadyExistsError()
+    if cellphone_taken:
+        raise CellphoneAlreadyExistsError()
+
+
+def _check_username(username: str):
+    if not username:
+        raise UsernameEmptyError()
+
+
+def _check_cellphone(cellphone: str):
     if not cellphone:
         raise CellphoneEmptyError()
 
     if not is_chinese_cellphone(cellphone):
         raise InvalidCellphoneError()
 
-    query = sa.select(sa.func.count()).where((UserModel.cellphone == cellphone) & UserModel.exist_filter())
+
+async def _query_taken(
+    session: AsyncSession, username: str | None, cellphone: str | None, exclude_id: int = None
+) -> tuple[bool, bool]:
+    """用一条 EXISTS 查询判断用户名、手机号是否已被未删除的用户占用，未传入的一项返回 False"""
+    shape = 'taken'
+    if username is not None:
+        shape += ':username'
+    if cellphone is not None:
+        shape += ':cellphone'
     if exclude_id:
-        query = query.where(UserModel.id != exclude_id)
-    result = await session.execute(query)
-    if result.scalar() > 0:
-        raise CellphoneAlreadyExistsError()
+        shape += ':exclude_id'
+
+    def build():
+        def exists(condition):
+            conditions = [condition, UserModel.exist_filter()]
+            if exclude_id:
+                conditions.append(UserModel.id != sa.bindparam('exclude_id'))
+            return sa.exists().where(*conditions)
+
+        username_taken = (
+            exists((UserModel.username == sa.bindparam('username')) | (UserModel.cellphone == sa.bindparam('username')))
+            if username is not None
+            else sa.false()
+        )
+        cellphone_taken = (
+            exists(UserModel.cellphone == sa.bindparam('cellphone')) if cellphone is not None else sa.false()
+        )
+        return sa.select(username_taken, cellphone_taken)
+
+    statement = UserModel.cached_statement(shape, build)
+    params = {'username': username, 'cellphone': cellphone, 'exclude_id': exclude_id}
+    row = (await session.execute(statement, {key: value for key, value in params.items() if value is not None})).one()
+    return row[0], row[1]
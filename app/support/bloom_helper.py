@@ -0,0 +1,61 @@
+#
+# 布隆过滤器
+#
+# 提供进程内的布隆过滤器，用于快速判断元素“一定不存在”，以减少对外部存储的查询。
+#
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """布隆过滤器（只增不删，元素数量超过容量后误判率会上升，需重建）
+
+    Args:
+        capacity: 预期容纳的元素数量
+        error_rate: 在预期容量下的误判率
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # 双重哈希：由一次 blake2b 摘要派生出 k 个位置
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        """添加元素（已包含的元素不重复计数，同一元素可能经本地调用和广播各添加一次）"""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self._bits[pos >> 3] & mask:
+                self._bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def is_saturated(self) -> bool:
+        """元素数量是否已超过预期容量"""
+        return self.count > self.capacity
+
+    def stats(self) -> dict:
+        """返回过滤器统计信息"""
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'num_bits': self.num_bits,
+            'num_hashes': self.num_hashes,
+        }
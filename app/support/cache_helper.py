@@ -0,0 +1,104 @@
+#
+# 进程内缓存辅助工具
+#
+# 提供有界、支持 TTL 的 LRU 缓存，用于在单个 worker 内缓存热点数据，并统计命中情况。
+#
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+    """有界的 LRU + TTL 缓存（非线程安全，供单个事件循环内使用）
+
+    Args:
+        maxsize: 最大条目数，超出时淘汰最久未使用的条目
+        ttl: 默认存活时间（秒）
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self.evictions = 0  # 因容量不足被淘汰的次数
+        self.expirations = 0  # 因过期被移除的次数
+        self.invalidations = 0  # 被主动失效的次数
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, record: bool = True) -> Any:
+        """获取缓存值，不存在或已过期时返回 default"""
+        item = self._data.get(key)
+        if item is None:
+            if record:
+                self.misses += 1
+            return default
+
+        value, expire_at = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            if record:
+                self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        if record:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """写入缓存
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 存活时间（秒），默认使用实例的 ttl，小于等于 0 时不写入
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """主动失效一个条目"""
+        item = self._data.pop(key, None)
+        if item is None:
+            return default
+        self.invalidations += 1
+        return item[0]
+
+    def clear(self):
+        """清空缓存"""
+        self.invalidations += len(self._data)
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """返回缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
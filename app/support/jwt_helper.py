@@ -3,17 +3,386 @@
 #
 # 提供 JWT 访问令牌的创建、解码和验证功能，支持自定义声明和过期时间。
 #
+# 签名与验证由可替换的引擎完成（config.auth.JWT_ENGINE）：
+#   - jose：基于 python-jose 的通用实现
+#   - native：基于标准库 hmac 的 HS256/HS384/HS512 快速实现，与 jose 签发的令牌互通
+# 算法为 RS256/ES256/EdDSA 时使用非对称引擎：私钥签发，按头部 kid 选择公钥验证，
+# 公钥通过 /.well-known/jwks.json 公开，其他服务与网关可在本地验证令牌。
+# 所有引擎抛出相同的 jose 异常类型，异常处理无需区分。
+#
 
+import base64
+import hashlib
+import hmac
+import json
+import time
 import uuid
+from calendar import timegm
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any, Union
 
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
 from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
 
 from app.schemas.jwt import JWTSc
+from app.support import metrics_helper
+from app.support.cache_helper import TTLCache
 from config.auth import settings
 
 
+class JoseEngine:
+    """基于 python-jose 的 JWT 引擎"""
+
+    def __init__(self, key: str, algorithm: str, issuer: str, audience: str):
+        self.key = key
+        self.algorithm = algorithm
+        self.issuer = issuer
+        self.audience = audience
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        return jwt.decode(
+            token,
+            key=self.key,
+            algorithms=self.algorithm,
+            issuer=self.issuer,
+            audience=self.audience,
+            # python-jose 默认放行缺少 aud 的令牌，配置了接收方时要求必须携带
+            options={'require_aud': self.audience is not None},
+        )
+
+
+class HmacEngine:
+    """基于标准库 hmac 的 JWT 引擎（仅支持 HS256/HS384/HS512）
+
+    预先计算好密钥的 HMAC 状态与固定的头部段，签名和验证时只做一次 copy + update。
+    声明校验规则（iss、aud、exp、nbf、iat）与 python-jose 保持一致。
+    """
+
+    DIGESTS = {'HS256': hashlib.sha256, 'HS384': hashlib.sha384, 'HS512': hashlib.sha512}
+
+    def __init__(self, key: str, algorithm: str, issuer: str, audience: str):
+        if algorithm not in self.DIGESTS:
+            raise ValueError(f'Unsupported HMAC algorithm: {algorithm}')
+
+        self.algorithm = algorithm
+        self.issuer = issuer
+        self.audience = audience
+        self._mac = hmac.new(key.encode('utf-8'), digestmod=self.DIGESTS[algorithm])
+        self._header_segment = _b64encode(_json_dumps({'alg': algorithm, 'typ': 'JWT'}))
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        claims = claims.copy()
+        for time_claim in ('exp', 'iat', 'nbf'):
+            if isinstance(claims.get(time_claim), datetime):
+                claims[time_claim] = timegm(claims[time_claim].utctimetuple())
+
+        signing_input = f'{self._header_segment}.{_b64encode(_json_dumps(claims))}'
+        return f'{signing_input}.{_b64encode(self._sign(signing_input.encode("ascii")))}'
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            signing_input, signature_segment = token.rsplit('.', 1)
+            header_segment, payload_segment = signing_input.split('.')
+            signing_input = signing_input.encode('ascii')
+        except (ValueError, UnicodeEncodeError):
+            raise JWTError('Not enough segments')
+
+        # 与本引擎签发的头部完全一致时跳过解析
+        if header_segment != self._header_segment:
+            header = _json_loads_segment(header_segment)
+            if not isinstance(header, dict) or header.get('alg') != self.algorithm:
+                raise JWTError('The specified alg value is not allowed')
+
+        if not hmac.compare_digest(self._sign(signing_input), _b64decode(signature_segment)):
+            raise JWTError('Signature verification failed.')
+
+        claims = _json_loads_segment(payload_segment)
+        if not isinstance(claims, dict):
+            raise JWTError('Invalid payload string: must be a json object')
+
+        _validate_claims(claims, self.issuer, self.audience)
+        return claims
+
+
+class AsymmetricEngine:
+    """基于 cryptography 的非对称 JWT 引擎（RS256/ES256/EdDSA）
+
+    使用 signing_kid 对应的私钥签发，头部携带 kid；验证时按 kid 查找启动时加载好的公钥。
+    轮换密钥时先放入新私钥并切换 signing_kid，旧密钥保留到其签发的令牌全部过期后再移除。
+
+    Args:
+        keys: kid -> 私钥或公钥对象
+        signing_kid: 用于签发的私钥 kid
+    """
+
+    ALGORITHMS = ('RS256', 'ES256', 'EdDSA')
+
+    def __init__(self, keys: dict[str, Any], algorithm: str, signing_kid: str, issuer: str, audience: str):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f'Unsupported asymmetric algorithm: {algorithm}')
+
+        signing_key = keys.get(signing_kid)
+        if not hasattr(signing_key, 'sign') or _key_algorithm(signing_key) != algorithm:
+            raise ValueError(f'No {algorithm} private key found for kid: {signing_kid}')
+
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.issuer = issuer
+        self.audience = audience
+        self._signing_key = signing_key
+        self._header_segment = _b64encode(_json_dumps({'alg': algorithm, 'typ': 'JWT', 'kid': signing_kid}))
+
+        # kid -> (算法, 公钥)
+        self._verifiers = {
+            kid: (_key_algorithm(key), key.public_key() if hasattr(key, 'public_key') else key)
+            for kid, key in keys.items()
+        }
+        # 本引擎签发的头部段 -> (算法, 公钥)，命中时跳过头部解析
+        self._verifiers_by_header = {
+            _b64encode(_json_dumps({'alg': alg, 'typ': 'JWT', 'kid': kid})): (alg, public_key)
+            for kid, (alg, public_key) in self._verifiers.items()
+        }
+        self.jwks = {
+            'keys': [_public_jwk(kid, alg, public_key) for kid, (alg, public_key) in self._verifiers.items()]
+        }
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        claims = claims.copy()
+        for time_claim in ('exp', 'iat', 'nbf'):
+            if isinstance(claims.get(time_claim), datetime):
+                claims[time_claim] = timegm(claims[time_claim].utctimetuple())
+
+        signing_input = f'{self._header_segment}.{_b64encode(_json_dumps(claims))}'
+        signature = _sign(self.algorithm, self._signing_key, signing_input.encode('ascii'))
+        return f'{signing_input}.{_b64encode(signature)}'
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            signing_input, signature_segment = token.rsplit('.', 1)
+            header_segment, payload_segment = signing_input.split('.')
+            signing_input = signing_input.encode('ascii')
+        except (ValueError, UnicodeEncodeError):
+            raise JWTError('Not enough segments')
+
+        verifier = self._verifiers_by_header.get(header_segment)
+        if verifier is None:
+            header = _json_loads_segment(header_segment)
+            if not isinstance(header, dict):
+                raise JWTError('Invalid header string: must be a json object')
+            verifier = self._verifiers.get(header.get('kid'))
+            if verifier is None:
+                raise JWTError('Unable to find a signing key that matches the kid')
+            if header.get('alg') != verifier[0]:
+                raise JWTError('The specified alg value is not allowed')
+
+        if not _verify(*verifier, signing_input, _b64decode(signature_segment)):
+            raise JWTError('Signature verification failed.')
+
+        claims = _json_loads_segment(payload_segment)
+        if not isinstance(claims, dict):
+            raise JWTError('Invalid payload string: must be a json object')
+
+        _validate_claims(claims, self.issuer, self.audience)
+        return claims
+
+
+def _validate_claims(claims: dict[str, Any], issuer: str, audience: str):
+    """校验注册声明，规则与 python-jose 保持一致
+
+    配置了 issuer / audience 时，令牌必须携带对应的 iss / aud 且取值匹配，缺少时同样拒绝。
+    """
+    if audience is not None and 'aud' not in claims:
+        raise JWTError('missing required key "aud" among claims')
+
+    now = int(time.time())
+
+    if 'iat' in claims:
+        _int_claim(claims, 'iat', 'Issued At claim (iat) must be an integer.')
+
+    if 'nbf' in claims and _int_claim(claims, 'nbf', 'Not Before claim (nbf) must be an integer.') > now:
+        raise JWTClaimsError('The token is not yet valid (nbf)')
+
+    if 'exp' in claims and _int_claim(claims, 'exp', 'Expiration Time claim (exp) must be an integer.') < now:
+        raise ExpiredSignatureError('Signature has expired.')
+
+    if 'aud' in claims:
+        audience_claims = claims['aud']
+        if isinstance(audience_claims, str):
+            audience_claims = [audience_claims]
+        if not isinstance(audience_claims, list) or any(not isinstance(c, str) for c in audience_claims):
+            raise JWTClaimsError('Invalid claim format in token')
+        if audience not in audience_claims:
+            raise JWTClaimsError('Invalid audience')
+
+    if issuer is not None and claims.get('iss') != issuer:
+        raise JWTClaimsError('Invalid issuer')
+
+    if 'sub' in claims and not isinstance(claims['sub'], str):
+        raise JWTClaimsError('Subject must be a string.')
+
+    if 'jti' in claims and not isinstance(claims['jti'], str):
+        raise JWTClaimsError('JWT ID must be a string.')
+
+
+def _key_algorithm(key) -> str | None:
+    """根据密钥类型推断签名算法"""
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return 'RS256'
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name == 'secp256r1':
+        return 'ES256'
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return 'EdDSA'
+    return None
+
+
+def _sign(algorithm: str, key, data: bytes) -> bytes:
+    if algorithm == 'RS256':
+        return key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+    if algorithm == 'ES256':
+        # JWS 使用定长的 r || s，而非 DER 编码
+        r, s = decode_dss_signature(key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+    return key.sign(data)
+
+
+def _verify(algorithm: str, key, data: bytes, signature: bytes) -> bool:
+    try:
+        if algorithm == 'RS256':
+            key.verify(signature, data, padding.PKCS1v15(), hashes.SHA256())
+        elif algorithm == 'ES256':
+            if len(signature) != 64:
+                return False
+            r, s = int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:], 'big')
+            key.verify(encode_dss_signature(r, s), data, ec.ECDSA(hashes.SHA256()))
+        else:
+            key.verify(signature, data)
+    except InvalidSignature:
+        return False
+    return True
+
+
+def _public_jwk(kid: str, algorithm: str, public_key) -> dict[str, str]:
+    """将公钥转换为 JWK"""
+    jwk = {'kid': kid, 'use': 'sig', 'alg': algorithm}
+    if algorithm == 'RS256':
+        numbers = public_key.public_numbers()
+        jwk.update(kty='RSA', n=_b64encode_int(numbers.n), e=_b64encode_int(numbers.e))
+    elif algorithm == 'ES256':
+        numbers = public_key.public_numbers()
+        jwk.update(
+            kty='EC',
+            crv='P-256',
+            x=_b64encode(numbers.x.to_bytes(32, 'big')),
+            y=_b64encode(numbers.y.to_bytes(32, 'big')),
+        )
+    else:
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        jwk.update(kty='OKP', crv='Ed25519', x=_b64encode(raw))
+    return jwk
+
+
+def load_keys(keys_dir: str) -> dict[str, Any]:
+    """加载目录中的 PEM 密钥（私钥或仅用于验证的公钥），文件名（不含扩展名）作为 kid
+
+    Returns:
+        dict[str, Any]: kid -> 密钥对象，按 kid 排序
+    """
+    keys = {}
+    for path in sorted(Path(keys_dir).glob('*.pem')):
+        data = path.read_bytes()
+        try:
+            key = serialization.load_pem_private_key(data, password=None)
+        except ValueError:
+            key = serialization.load_pem_public_key(data)
+        if _key_algorithm(key) is None:
+            raise ValueError(f'Unsupported JWT key type: {path}')
+        keys[path.stem] = key
+    return keys
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64encode_int(value: int) -> str:
+    return _b64encode(value.to_bytes((value.bit_length() + 7) // 8 or 1, 'big'))
+
+
+def _b64decode(segment: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+    except (ValueError, TypeError):
+        raise JWTError('Invalid segment encoding')
+
+
+def _json_dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads_segment(segment: str) -> Any:
+    try:
+        return json.loads(_b64decode(segment))
+    except ValueError:
+        raise JWTError('Invalid segment string')
+
+
+def _int_claim(claims: dict[str, Any], name: str, message: str) -> int:
+    try:
+        return int(claims[name])
+    except (TypeError, ValueError):
+        raise JWTClaimsError(message)
+
+
+def _create_engine() -> Union[JoseEngine, HmacEngine, AsymmetricEngine]:
+    """根据配置创建 JWT 引擎"""
+    if settings.JWT_ALGORITHM in AsymmetricEngine.ALGORITHMS:
+        keys = load_keys(settings.JWT_KEYS_DIR)
+        private_kids = [
+            kid for kid, key in keys.items() if hasattr(key, 'sign') and _key_algorithm(key) == settings.JWT_ALGORITHM
+        ]
+        return AsymmetricEngine(
+            keys=keys,
+            algorithm=settings.JWT_ALGORITHM,
+            signing_kid=settings.JWT_SIGNING_KID or (private_kids[-1] if private_kids else ''),
+            issuer=settings.JWT_ISSUER,
+            audience=settings.JWT_AUDIENCE,
+        )
+
+    engine_kwargs = {
+        'key': settings.JWT_SECRET_KEY,
+        'algorithm': settings.JWT_ALGORITHM,
+        'issuer': settings.JWT_ISSUER,
+        'audience': settings.JWT_AUDIENCE,
+    }
+    if settings.JWT_ENGINE == 'native':
+        return HmacEngine(**engine_kwargs)
+    return JoseEngine(**engine_kwargs)
+
+
+engine = _create_engine()
+
+# 预先序列化的 JWKS（对称算法的密钥不公开，返回空集合）
+jwks_bytes = _json_dumps(getattr(engine, 'jwks', {'keys': []}))
+jwks_etag = f'"{hashlib.blake2b(jwks_bytes, digest_size=16).hexdigest()}"'
+
+# 已验证的 JWT 负载缓存：令牌摘要 -> JWTSc（条目在令牌过期时失效）
+_payload_cache = TTLCache(maxsize=settings.JWT_PAYLOAD_CACHE_SIZE, ttl=settings.JWT_TTL * 60)
+metrics_helper.register_source('jwt_payload_cache', _payload_cache.stats)
+
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None, additional_claims: dict[str, Any] = None
 ) -> str:
@@ -48,26 +417,28 @@ def create_access_token(
     if additional_claims:
         to_encode.update(additional_claims)
 
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    encoded_jwt = engine.encode(to_encode)
     return encoded_jwt
 
 
 def get_payload_by_token(encoded_jwt: str) -> JWTSc:
     """解码并返回 JWT 负载
 
+    同一令牌验证通过后会被缓存到其过期时间，返回的对象为共享实例，调用方不应修改。
+
     Args:
         encoded_jwt (str): 编码的 JWT 令牌
 
     Returns:
         JWTSc: 解码后的 JWT 数据
     """
-    payload = jwt.decode(
-        encoded_jwt,
-        key=settings.JWT_SECRET_KEY,
-        algorithms=settings.JWT_ALGORITHM,
-        issuer=settings.JWT_ISSUER,
-        audience=settings.JWT_AUDIENCE,
-    )
+    cache_key = hashlib.blake2b(encoded_jwt.encode('utf-8'), digest_size=16).digest()
+    validated_payload = _payload_cache.get(cache_key)
+    if validated_payload is not None:
+        return validated_payload
+
+    payload = engine.decode(encoded_jwt)
 
     validated_payload = JWTSc.model_validate(payload)
+    _payload_cache.set(cache_key, validated_payload, ttl=validated_payload.exp.timestamp() - time.time())
     return validated_payload
@@ -0,0 +1,77 @@
+#
+# 运行指标辅助工具
+#
+# 提供进程内指标的注册与汇总，供内部接口按 worker 导出缓存、连接池等运行状态。
+#
+
+import bisect
+import logging
+import os
+from typing import Any, Callable, Sequence
+
+_sources: dict[str, Callable[[], Any]] = {}
+
+# 默认的耗时分桶上界（毫秒）
+DEFAULT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """固定分桶的直方图（非线程安全，需在事件循环线程中记录）
+
+    Args:
+        buckets: 升序排列的分桶上界，超出最后一个上界的值计入 '+Inf'
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_MS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """记录一个观测值"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict[str, Any]:
+        """返回直方图数据（分桶计数为非累计值）"""
+        labels = [str(b) for b in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'avg': round(self.sum / self.count, 3) if self.count else None,
+            'max': round(self.max, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+def register_source(name: str, collector: Callable[[], Any]):
+    """注册一个指标来源
+
+    Args:
+        name: 指标名称（同名覆盖）
+        collector: 无参函数，返回可 JSON 序列化的指标数据
+    """
+    _sources[name] = collector
+
+
+def collect(names: Sequence[str] = None) -> dict[str, Any]:
+    """汇总当前 worker 的指标
+
+    Args:
+        names: 只汇总指定名称的指标（未注册的名称忽略），默认全部
+    """
+    metrics = {}
+    for name, collector in _sources.items():
+        if names is not None and name not in names:
+            continue
+        try:
+            metrics[name] = collector()
+        except Exception as e:
+            logging.error(f'Failed to collect metrics {name}: {e}')
+            metrics[name] = None
+    return {'pid': os.getpid(), 'metrics': metrics}
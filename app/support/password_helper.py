@@ -3,14 +3,35 @@
 #
 # 提供密码的哈希加密和验证功能，使用 bcrypt 算法确保密码安全。
 #
+# bcrypt 计算耗时较长（数百毫秒），在事件循环中请使用异步版本 averify_password / aget_password_hash，
+# 它们在专用的有界线程池中执行（bcrypt 会释放 GIL），排队任务过多时直接拒绝。
+#
+# 哈希成本（rounds）可在启动时按目标耗时校准（calibrate_rounds），
+# 登录时通过 needs_rehash 判断已存储的哈希是否需要按当前成本重新计算。
+#
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import bcrypt
 
+from app.exceptions import ServerBusyError
+from app.support import metrics_helper
+from config.auth import settings
+
+_rounds = settings.PASSWORD_HASH_ROUNDS  # 当前使用的 bcrypt 成本因子
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='bcrypt')
+_pending = 0  # 排队+执行中的任务数
+_rejected = 0  # 因排队过多被拒绝的任务数
+_wait_time = metrics_helper.Histogram()  # 排队等待耗时（毫秒）
+_run_time = metrics_helper.Histogram()  # 执行耗时（毫秒）
+
 
 def get_password_hash(password: str) -> str:
     """使用 bcrypt 哈希密码"""
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=_rounds)
     hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
     string_password = hashed_password.decode('utf8')
     return string_password
@@ -25,3 +46,131 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except ValueError:
         return False
     return result
+
+
+def get_rounds() -> int:
+    """获取当前使用的 bcrypt 成本因子"""
+    return _rounds
+
+
+def set_rounds(rounds: int):
+    """设置 bcrypt 成本因子（限制在 PASSWORD_HASH_MIN_ROUNDS ~ PASSWORD_HASH_MAX_ROUNDS 之间）"""
+    global _rounds
+    _rounds = min(max(rounds, settings.PASSWORD_HASH_MIN_ROUNDS), settings.PASSWORD_HASH_MAX_ROUNDS)
+
+
+def calibrate_rounds(target_ms: float) -> int:
+    """测量本机 bcrypt 耗时，返回单次哈希不超过目标耗时的最大成本因子
+
+    成本因子每加 1 耗时翻倍，从最小值开始逐级测量，预计下一级会超出目标时停止。
+
+    Args:
+        target_ms: 单次哈希的目标耗时（毫秒）
+
+    Returns:
+        int: 成本因子（不低于 PASSWORD_HASH_MIN_ROUNDS，不高于 PASSWORD_HASH_MAX_ROUNDS）
+    """
+    sample = b'bcrypt-calibration'
+    rounds = settings.PASSWORD_HASH_MIN_ROUNDS
+    while rounds < settings.PASSWORD_HASH_MAX_ROUNDS:
+        started_at = time.perf_counter()
+        bcrypt.hashpw(sample, bcrypt.gensalt(rounds=rounds))
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        if elapsed_ms * 2 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """判断已存储的哈希是否需要按当前成本重新计算
+
+    仅在成本低于当前值、高于允许的最大值或不是 $2b$ 格式时返回 True。
+    不向下迁移较高成本的哈希，避免不同规格节点之间反复重算。
+    """
+    try:
+        prefix, cost = hashed_password.split('$')[1:3]
+        cost = int(cost)
+    except ValueError:
+        return False
+    return prefix != '2b' or cost < _rounds or cost > settings.PASSWORD_HASH_MAX_ROUNDS
+
+
+async def acalibrate_rounds(target_ms: float) -> int:
+    """calibrate_rounds 的异步版本，在 bcrypt 线程池中执行"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, calibrate_rounds, target_ms)
+
+
+async def aget_password_hash(password: str) -> str:
+    """get_password_hash 的异步版本，在 bcrypt 线程池中执行
+
+    Raises:
+        ServerBusyError: 排队任务数超过 PASSWORD_HASH_MAX_PENDING
+    """
+    return await _run_in_executor(get_password_hash, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password 的异步版本，在 bcrypt 线程池中执行
+
+    Raises:
+        ServerBusyError: 排队任务数超过 PASSWORD_HASH_MAX_PENDING
+    """
+    return await _run_in_executor(verify_password, plain_password, hashed_password)
+
+
+async def _run_in_executor(func, *args):
+    global _pending, _rejected
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise ServerBusyError(headers={'Retry-After': '1'})
+
+    def timed_call():
+        started_at = time.perf_counter()
+        return func(*args), started_at, time.perf_counter()
+
+    loop = asyncio.get_running_loop()
+    _pending += 1
+    submitted_at = time.perf_counter()
+    try:
+        future = _executor.submit(timed_call)
+    except BaseException:
+        _pending -= 1
+        raise
+
+    # 名额在线程池任务结束时才释放：等待的协程被取消时，已开始的 bcrypt 计算仍在占用线程
+    future.add_done_callback(lambda _: _release_slot(loop))
+    result, started_at, finished_at = await asyncio.wrap_future(future)
+
+    _wait_time.observe((started_at - submitted_at) * 1000)
+    _run_time.observe((finished_at - started_at) * 1000)
+    return result
+
+
+def _release_slot(loop: asyncio.AbstractEventLoop):
+    """在线程池任务结束（或排队中被取消）时调用，回到事件循环线程中释放名额"""
+
+    def release():
+        global _pending
+        _pending -= 1
+
+    try:
+        loop.call_soon_threadsafe(release)
+    except RuntimeError:
+        pass  # 事件循环已关闭
+
+
+def _get_executor_stats() -> dict:
+    return {
+        'rounds': _rounds,
+        'workers': settings.PASSWORD_HASH_WORKERS,
+        'max_pending': settings.PASSWORD_HASH_MAX_PENDING,
+        'pending': _pending,
+        'queue_depth': max(0, _pending - settings.PASSWORD_HASH_WORKERS),
+        'rejected': _rejected,
+        'wait_ms': _wait_time.snapshot(),
+        'run_ms': _run_time.snapshot(),
+    }
+
+
+metrics_helper.register_source('password_hash_executor', _get_executor_stats)
@@ -0,0 +1,74 @@
+#
+# 查询辅助工具
+#
+# 提供游标分页（keyset）的游标编解码，以及基于统计信息的行数估算，避免 OFFSET 深翻页和大表 COUNT(*)。
+#
+
+import base64
+import datetime
+import json
+import uuid
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+from app.exceptions import ValidationError
+
+
+class _ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <语句>，保留原语句的绑定参数"""
+
+    inherit_cache = False
+    is_select = True  # 只读语句，可路由到只读副本
+
+    def __init__(self, statement: sa.Select):
+        self.statement = statement
+
+
+@compiles(_ExplainJson, 'postgresql')
+def _compile_explain_json(element: _ExplainJson, compiler, **kw):
+    return f'EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}'
+
+
+def encode_cursor(created_at: datetime.datetime, id: uuid.UUID) -> str:
+    """将排序键 (created_at, id) 编码为不透明的游标"""
+    timestamp_us = int(created_at.timestamp()) * 1_000_000 + created_at.microsecond
+    raw = json.dumps([timestamp_us, id.hex], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """解码游标，返回排序键 (created_at, id)
+
+    Raises:
+        ValidationError: 游标格式无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp_us, id_hex = json.loads(raw)
+        seconds, microseconds = divmod(int(timestamp_us), 1_000_000)
+        created_at = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).replace(microsecond=microseconds)
+        return created_at, uuid.UUID(id_hex)
+    except (ValueError, TypeError, OverflowError):
+        raise ValidationError('Invalid cursor')
+
+
+async def estimate_table_rows(session: AsyncSession, table: sa.Table) -> int | None:
+    """根据 pg_class.reltuples 估算表的总行数（表从未 ANALYZE 时返回 None）"""
+    reltuples = await session.scalar(
+        sa.text('SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)'),
+        {'table_name': table.fullname},
+    )
+    return reltuples if reltuples is not None and reltuples >= 0 else None
+
+
+async def estimate_query_rows(session: AsyncSession, statement: sa.Select) -> int:
+    """根据查询计划估算语句返回的行数（只规划不执行）"""
+    plan: Any = await session.scalar(_ExplainJson(statement))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,163 @@
+#
+# SQL 执行统计工具
+#
+# 在一段代码（如一次请求）范围内收集执行过的 SQL 语句及耗时，由 sqlalchemy_provider 的引擎事件记录。
+# 支持嵌套收集：同一条语句会同时计入所有处于活动状态的收集器。
+#
+# query_budget 用于声明一段代码或一个接口允许执行的语句数和数据库耗时，超出时按 SQL_QUERY_BUDGET_MODE
+# 记录日志或抛出异常，防止 N+1 查询等问题回归。
+#
+
+import contextlib
+import contextvars
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Generator
+from dataclasses import dataclass, field
+from typing import Literal, TypeVar
+
+from config.database import settings as db_settings
+
+_F = TypeVar('_F', bound=Callable)
+_collectors: contextvars.ContextVar[tuple['QueryStats', ...]] = contextvars.ContextVar('query_collectors', default=())
+
+
+@dataclass
+class StatementStats:
+    """单条（规范化后的）语句的执行统计"""
+
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class QueryStats:
+    """一段代码范围内的 SQL 执行统计"""
+
+    count: int = 0
+    total_ms: float = 0.0
+    statements: dict[str, StatementStats] = field(default_factory=lambda: defaultdict(StatementStats))
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        stats = self.statements[statement]
+        stats.count += 1
+        stats.total_ms += duration_ms
+        if duration_ms > stats.max_ms:
+            stats.max_ms = duration_ms
+
+    def repeated(self, threshold: int) -> dict[str, StatementStats]:
+        """执行次数达到阈值的语句（疑似 N+1 查询）"""
+        return {statement: stats for statement, stats in self.statements.items() if stats.count >= threshold}
+
+    def report(self, limit: int = 10) -> str:
+        """按总耗时降序列出语句，便于阅读"""
+        lines = [f'{self.count} statement(s), {self.total_ms:.1f}ms in total']
+        top = sorted(self.statements.items(), key=lambda item: item[1].total_ms, reverse=True)[:limit]
+        for statement, stats in top:
+            lines.append(f'  {stats.count}x {stats.total_ms:.1f}ms (max {stats.max_ms:.1f}ms): {statement}')
+        if len(self.statements) > limit:
+            lines.append(f'  ... {len(self.statements) - limit} more')
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def collect() -> Generator[QueryStats, None, None]:
+    """收集代码块内执行的 SQL 语句
+
+    示例:
+        with query_stats_helper.collect() as stats:
+            await session.execute(...)
+        print(stats.count, stats.total_ms)
+    """
+    stats = QueryStats()
+    token = _collectors.set((*_collectors.get(), stats))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def record(statement: str, duration_ms: float):
+    """记录一次语句执行（没有活动的收集器时不做任何事）"""
+    for stats in _collectors.get():
+        stats.record(statement, duration_ms)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """超出查询预算（SQL_QUERY_BUDGET_MODE 为 raise 时抛出）"""
+
+
+class query_budget:
+    """查询预算，可作为接口装饰器或上下文管理器使用
+
+    作为接口装饰器时只做标记，由 QueryStatsMiddleware 在请求结束后按整个请求（包括依赖项）检查；
+    作为上下文管理器时在退出代码块时检查。
+
+    示例:
+        @router.get('/users')
+        @query_budget(max_queries=5)
+        async def get_users(...): ...
+
+        with query_budget(max_queries=2, mode='raise'):
+            await client.get('/api/users')
+
+    Args:
+        max_queries: 允许执行的最大语句数，None 表示不限制
+        max_ms: 允许的最大数据库总耗时（毫秒），None 表示不限制
+        mode: 超出预算时的处理方式，默认使用 SQL_QUERY_BUDGET_MODE
+        name: 报告中显示的名称，作为接口装饰器时默认为请求方法和路由路径
+    """
+
+    def __init__(
+        self,
+        max_queries: int = None,
+        max_ms: float = None,
+        mode: Literal['off', 'warn', 'raise'] = None,
+        name: str = None,
+    ):
+        self.max_queries = max_queries
+        self.max_ms = max_ms
+        self.mode = mode
+        self.name = name
+        self._collector = None
+        self._stats = None
+
+    def __call__(self, func: _F) -> _F:
+        func.__query_budget__ = self
+        return func
+
+    def __enter__(self) -> QueryStats:
+        self._collector = collect()
+        self._stats = self._collector.__enter__()
+        return self._stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._collector.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.check(self._stats, self.name or 'code block')
+
+    def check(self, stats: QueryStats, name: str):
+        """检查统计结果是否超出预算
+
+        Raises:
+            QueryBudgetExceeded: 超出预算且处理方式为 raise
+        """
+        mode = self.mode or db_settings.SQL_QUERY_BUDGET_MODE
+        if mode == 'off':
+            return
+
+        violations = []
+        if self.max_queries is not None and stats.count > self.max_queries:
+            violations.append(f'{stats.count} statements (budget {self.max_queries})')
+        if self.max_ms is not None and stats.total_ms > self.max_ms:
+            violations.append(f'{stats.total_ms:.1f}ms (budget {self.max_ms}ms)')
+        if not violations:
+            return
+
+        message = f'Query budget exceeded in {name}: {", ".join(violations)}\n{stats.report()}'
+        if mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        logging.warning(message)
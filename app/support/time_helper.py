@@ -9,6 +9,11 @@ from datetime import datetime, timezone
 import pytz
 
 
+def is_valid_timezone(timezone_str: str) -> bool:
+    """判断是否为已知的时区名称（如 Asia/Shanghai、UTC）"""
+    return timezone_str in pytz.all_timezones_set
+
+
 def parse_datetime_in_timezone(time_str: str, timezone_str: str, time_format: str = '%Y-%m-%dT%H:%M:%SZ') -> datetime:
     """按给定格式解析无时区的时间字符串，并附加指定时区"""
     naive_dt = datetime.strptime(time_str, time_format)
@@ -11,3 +11,6 @@ USER_STATE_TYPE = Literal['disabled', 'enabled']
 
 # 性别
 GENDER_TYPE = Literal['male', 'female', 'unknown']
+
+# 数据导出格式
+EXPORT_FORMAT_TYPE = Literal['csv', 'ndjson']
@@ -0,0 +1,65 @@
+#
+# JWT 引擎基准测试
+#
+# 对比 jose 与 native（标准库 hmac）引擎签发、验证同一组声明的单次耗时。
+# 用法：python -m benchmarks.jwt_engines [--algorithm HS256] [--number 20000]
+#
+
+import argparse
+import functools
+import time
+import timeit
+import uuid
+
+from app.support.jwt_helper import HmacEngine, JoseEngine
+
+
+def _claims() -> dict:
+    now = int(time.time())
+    return {
+        'iss': 'fastapi',
+        'aud': 'fastapi',
+        'sub': str(uuid.uuid4()),
+        'exp': now + 3600,
+        'nbf': now,
+        'iat': now,
+        'jti': str(uuid.uuid4()),
+    }
+
+
+def _measure(func, number: int, repeat: int) -> float:
+    """返回多轮测试中最快一轮的单次耗时（微秒）"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1_000_000
+
+
+def main(args: argparse.Namespace):
+    claims = _claims()
+    engines = {
+        'jose': JoseEngine('benchmark-secret', args.algorithm, 'fastapi', 'fastapi'),
+        'native': HmacEngine('benchmark-secret', args.algorithm, 'fastapi', 'fastapi'),
+    }
+
+    results = {}
+    for name, engine in engines.items():
+        token = engine.encode(claims)
+        results[name] = (
+            _measure(functools.partial(engine.encode, claims), args.number, args.repeat),
+            _measure(functools.partial(engine.decode, token), args.number, args.repeat),
+        )
+
+    print(f'{args.algorithm}，每项 {args.number} 次 x {args.repeat} 轮，取最快一轮')
+    print(f'{"engine":<8}{"encode (µs)":>14}{"decode (µs)":>14}')
+    for name, (encode_us, decode_us) in results.items():
+        print(f'{name:<8}{encode_us:>14.2f}{decode_us:>14.2f}')
+
+    jose_encode, jose_decode = results['jose']
+    native_encode, native_decode = results['native']
+    print(f'native 加速：encode {jose_encode / native_encode:.1f}x，decode {jose_decode / native_decode:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对比 jose 与 native JWT 引擎的耗时')
+    parser.add_argument('--algorithm', choices=list(HmacEngine.DIGESTS), default='HS256', help='HMAC 算法')
+    parser.add_argument('--number', type=int, default=20000, help='每轮执行次数')
+    parser.add_argument('--repeat', type=int, default=5, help='测试轮数')
+    main(parser.parse_args())
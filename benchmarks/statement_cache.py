@@ -0,0 +1,94 @@
+#
+# 语句缓存基准测试
+#
+# 对比每次重新构建查询语句与复用 cached_statement 缓存的语句时，一次查询在发送到驱动前的 Python 开销：
+# 构建表达式树、计算缓存键、查找编译缓存并提取参数（与 Session.execute 中的步骤相同，不连接数据库）。
+# 用法：python -m benchmarks.statement_cache [--number 20000] [--repeat 5]
+#
+
+import argparse
+import asyncio
+import timeit
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.util import LRUCache
+
+from app.models.user import UserModel
+
+_dialect = asyncpg_dialect()
+_compiled_cache = LRUCache(500)
+
+
+class _CaptureSession:
+    """记录模型方法传给会话的语句和参数，用于取得缓存的语句对象"""
+
+    async def scalar(self, statement, params=None):
+        self.statement, self.params = statement, params
+
+
+def _prepare(statement: sa.Executable, params: dict):
+    """执行前的 Python 开销：缓存键、编译缓存查找与参数提取"""
+    compiled, extracted_params, *_ = statement._compile_w_cache(
+        _dialect, compiled_cache=_compiled_cache, column_keys=sorted(params)
+    )
+    return compiled.construct_params(params, extracted_parameters=extracted_params)
+
+
+def _get_by_id_uncached(id: uuid.UUID):
+    statement = sa.select(UserModel).where(
+        UserModel.id == id, sa.or_(UserModel.deleted_at.is_(None), UserModel.deleted_at > sa.func.now())
+    )
+    return _prepare(statement, {})
+
+
+def _get_by_account_uncached(account: str):
+    statement = sa.select(UserModel).where(
+        (UserModel.username == account) | (UserModel.cellphone == account),
+        sa.or_(UserModel.deleted_at.is_(None), UserModel.deleted_at > sa.func.now()),
+    )
+    return _prepare(statement, {})
+
+
+def _cached(call) -> tuple[sa.Executable, dict]:
+    session = _CaptureSession()
+    asyncio.run(call(session))
+    return session.statement, session.params
+
+
+def _measure(func, number: int, repeat: int) -> float:
+    """返回多轮测试中最快一轮的单次耗时（微秒）"""
+    func()  # 预热编译缓存
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1_000_000
+
+
+def main(args: argparse.Namespace):
+    id, account = uuid.uuid4(), 'benchmark'
+    get_by_id, get_by_id_params = _cached(lambda session: UserModel.get_one_by(session, id=id))
+    get_by_account, get_by_account_params = _cached(lambda session: UserModel.get_by_account(session, account))
+
+    cases = {
+        'get by id': (
+            lambda: _get_by_id_uncached(id),
+            lambda: _prepare(get_by_id, get_by_id_params),
+        ),
+        'login lookup': (
+            lambda: _get_by_account_uncached(account),
+            lambda: _prepare(get_by_account, get_by_account_params),
+        ),
+    }
+
+    print(f'每项 {args.number} 次 x {args.repeat} 轮，取最快一轮（asyncpg 方言，不连接数据库）')
+    print(f'{"query":<14}{"rebuilt (µs)":>14}{"cached (µs)":>14}')
+    for name, (uncached, cached) in cases.items():
+        uncached_us = _measure(uncached, args.number, args.repeat)
+        cached_us = _measure(cached, args.number, args.repeat)
+        print(f'{name:<14}{uncached_us:>14.2f}{cached_us:>14.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对比重新构建语句与复用缓存语句的 Python 开销')
+    parser.add_argument('--number', type=int, default=20000, help='每轮执行次数')
+    parser.add_argument('--repeat', type=int, default=5, help='测试轮数')
+    main(parser.parse_args())
@@ -2,8 +2,11 @@ import datetime
 import logging
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from app.jobs import partition_job, purge_job
+from config.jobs import settings as jobs_settings
 
-# from apscheduler.triggers.cron import CronTrigger
 # from apscheduler.triggers.date import DateTrigger
 
 
@@ -24,3 +27,22 @@ def register_asyncio_jobs(scheduler: AsyncIOScheduler):
     #     trigger=CronTrigger(second="*/5"),  # 每 5 秒执行一次
     #     next_run_time=first_run_time,
     # )
+
+    # 分区维护：预先创建未来的分区，清理过期的分区
+    scheduler.add_job(
+        partition_job.maintain_partitions,
+        trigger=CronTrigger.from_crontab(jobs_settings.PARTITION_CRON),
+        next_run_time=first_run_time,
+        id='partition_maintenance',
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # 分批清理软删除超过保留期的用户
+    scheduler.add_job(
+        purge_job.purge_deleted_users,
+        trigger=CronTrigger.from_crontab(jobs_settings.USER_PURGE_CRON),
+        id='purge_deleted_users',
+        max_instances=1,
+        coalesce=True,
+    )
@@ -1,12 +1,49 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from config.config import settings as app_settings
+
 
 class Settings(BaseSettings):
-    JWT_TTL: int = 60 * 24 * 7  # 7 天
+    JWT_TTL: int = 15  # 访问令牌有效期（分钟）
+    JWT_REFRESH_TTL: int = 60 * 24 * 30  # 刷新令牌有效期（分钟），30 天
+    JWT_STATELESS_ACCESS_TOKEN: bool = False  # 访问令牌仅做无状态校验（不查吊销记录），注销和吊销要等访问令牌过期后才生效
     JWT_ISSUER: str = 'fastapi'
     JWT_AUDIENCE: str = 'fastapi'
     JWT_SECRET_KEY: str = 'fastapi123456'
-    JWT_ALGORITHM: str = 'HS256'
+    JWT_ALGORITHM: str = 'HS256'  # HS256/HS384/HS512 使用 JWT_SECRET_KEY；RS256/ES256/EdDSA 使用 JWT_KEYS_DIR 中的密钥
+    JWT_ENGINE: Literal['jose', 'native'] = 'jose'  # HS* 算法的 JWT 引擎：jose（通用）或 native（标准库 hmac）
+    JWT_KEYS_DIR: str = app_settings.BASE_PATH + '/storage/jwt_keys'  # 非对称密钥目录，文件名（不含 .pem）即 kid
+    JWT_SIGNING_KID: str = ''  # 用于签发的私钥 kid，为空时使用目录中与算法匹配、文件名排序最后的私钥
+    JWT_JWKS_MAX_AGE: int = 60 * 5  # JWKS 响应的缓存时间（秒）
+    JWT_PAYLOAD_CACHE_SIZE: int = 10000  # 每个 worker 缓存的已验证 JWT 负载条目上限（0 表示不缓存）
+
+    INTROSPECTION_SECRET: str = ''  # 令牌检查接口的调用密钥（X-Introspection-Secret 请求头），为空时禁用该接口
+    INTROSPECTION_MAX_TOKENS: int = 100  # 单次检查的令牌数量上限
+    INTROSPECTION_CACHE_LEEWAY: int = 30  # 有效结果的缓存提示比令牌过期时间提前的秒数
+
+    PASSWORD_HASH_ROUNDS: int = 12  # bcrypt 成本因子（未启用校准时使用）
+    PASSWORD_HASH_TARGET_MS: int = 0  # 启动时按此目标耗时（毫秒）校准成本因子，0 表示不校准
+    PASSWORD_HASH_MIN_ROUNDS: int = 10  # 成本因子下限
+    PASSWORD_HASH_MAX_ROUNDS: int = 15  # 成本因子上限，超过此值的已存储哈希会在登录时降级重算
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt 专用线程池大小（每个 worker）
+    PASSWORD_HASH_MAX_PENDING: int = 32  # 排队+执行中的 bcrypt 任务上限，超出时直接拒绝
+
+    LOGIN_FAILURE_WINDOW: int = 60 * 15  # 登录失败计数的滑动窗口（秒）
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5  # 窗口内同一用户名允许的失败次数，超出后锁定
+    LOGIN_MAX_FAILURES_PER_IP: int = 20  # 窗口内同一 IP 允许的失败次数，超出后锁定
+    LOGIN_LOCKOUT_BASE: int = 60  # 首次锁定时长（秒），此后每多失败一次翻倍
+    LOGIN_LOCKOUT_MAX: int = 60 * 60  # 最长锁定时长（秒）
+
+    TOKEN_CACHE_SIZE: int = 10000  # 每个 worker 缓存的令牌吊销状态条目上限
+    TOKEN_CACHE_TTL: int = 60  # 有效令牌状态的本地缓存时间（秒），用于兜底广播丢失的情况
+    TOKEN_BLOOM_CAPACITY: int = 100000  # 已吊销 jti 布隆过滤器的初始容量
+    TOKEN_BLOOM_ERROR_RATE: float = 0.001  # 布隆过滤器的误判率
+    TOKEN_GENERATION_CACHE_TTL: int = 300  # 用户令牌代数的本地缓存时间（秒），用于兜底广播丢失的情况
+
+    USER_CACHE_SIZE: int = 10000  # 每个 worker 缓存的认证用户快照条目上限
+    USER_CACHE_TTL: int = 60  # 认证用户快照的缓存时间（秒），用于兜底广播丢失的情况
 
     model_config = SettingsConfigDict(
         env_file='.env',
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from config.config import settings as app_settings
@@ -10,6 +12,31 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = 'postgres'
     POSTGRES_PASSWORD: str = 'fastapi123456'
 
+    POSTGRES_TIME_ZONE: str = 'Asia/Shanghai'  # 数据库连接的默认时区（请求未指定时区时使用）
+
+    # 连接池（每个 worker 一个连接池，最大连接数 = POOL_SIZE + MAX_OVERFLOW）
+    POSTGRES_POOL_SIZE: int = 4  # 常驻连接数
+    POSTGRES_MAX_OVERFLOW: int = 10  # 高峰时允许额外创建的连接数
+    POSTGRES_POOL_TIMEOUT: float = 30  # 获取连接的最长等待时间（秒），超时抛出 TimeoutError
+    POSTGRES_POOL_RECYCLE: int = -1  # 连接使用超过此时间（秒）后重建，-1 表示不回收
+    POSTGRES_POOL_PRE_PING: bool = False  # 取出连接时先检查是否可用（多一次往返）
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100  # 每个连接缓存的预编译语句数，使用 pgbouncer 事务模式时设为 0
+    POSTGRES_BULK_COPY_THRESHOLD: int = 1000  # 批量写入的行数达到此值时改用 COPY，否则使用多行 INSERT
+    POSTGRES_STREAM_BATCH_SIZE: int = 1000  # 流式导出时服务端游标每批读取的行数
+
+    # SQL 监控（按规范化后的语句统计耗时，见 app/providers/sqlalchemy_provider.py）
+    SQL_SLOW_QUERY_MS: float = 200  # 慢查询阈值（毫秒），超过时记录日志
+    SQL_SLOW_QUERY_EXPLAIN: bool = False  # 慢查询是否附带 EXPLAIN (ANALYZE, BUFFERS)（仅 SELECT，会再执行一次，用于排查）
+    SQL_REPEATED_QUERY_THRESHOLD: int = 10  # 同一请求中同一语句执行次数达到此值时视为疑似 N+1 查询
+    SQL_MAX_TRACKED_STATEMENTS: int = 500  # 最多单独统计的语句数，超出后合并到 <other>
+    SQL_QUERY_BUDGET_MODE: Literal['off', 'warn', 'raise'] = 'warn'  # 超出查询预算时的处理：忽略、记录日志、抛出异常（测试用）
+
+    # 只读副本（与主库使用相同的数据库名、用户和密码，连接池参数同上）
+    POSTGRES_REPLICA_HOSTS: list[str] = []  # 副本地址列表，如 ["replica1", "replica2:5433"]，为空时全部走主库
+    POSTGRES_REPLICA_STRATEGY: Literal['round_robin', 'least_loaded'] = 'round_robin'  # 副本选择策略
+    POSTGRES_REPLICA_MAX_LAG: float = 5  # 允许的最大复制延迟（秒），超过时该副本暂不参与路由
+    POSTGRES_REPLICA_LAG_CHECK_INTERVAL: float = 5  # 复制延迟检查间隔（秒）
+
     POSTGRESQL_SCRIPTS_DIR: str = f'{app_settings.BASE_PATH}/database/postgresql'  # PostgreSQL脚本目录
 
     @property
@@ -0,0 +1,28 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """定时任务配置"""
+
+    PARTITION_CRON: str = '0 3 * * *'  # 分区维护任务的执行时间（crontab 表达式，调度器所在时区）
+
+    # 分批维护任务（每批在独立事务中执行，批次之间休眠，避免长时间持锁和复制延迟）
+    BATCH_SIZE: int = 500  # 每批处理的行数
+    BATCH_SLEEP: float = 0.5  # 批次之间的休眠时间（秒）
+    BATCH_LOCK_TIMEOUT: int = 2000  # 每批的锁等待超时（毫秒），超时后结束本次执行，下次从断点继续
+    BATCH_MAX_REPLICA_LAG: float = 2  # 副本复制延迟超过此值（秒）时暂停处理，等待副本追上
+
+    # 清理软删除的用户
+    USER_PURGE_CRON: str = '30 3 * * *'  # 执行时间（crontab 表达式）
+    USER_PURGE_RETENTION_DAYS: int = 30  # 删除超过此天数的用户才会被清理
+    USER_PURGE_ARCHIVE: bool = False  # 清理前是否归档到 users_archive 表
+
+    model_config = SettingsConfigDict(
+        env_prefix='JOB_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+        extra='ignore',  # 忽略额外的输入
+    )
+
+
+settings = Settings()
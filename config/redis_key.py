@@ -8,9 +8,22 @@ class Settings(BaseSettings):
     主要为统一管理 redis key 的前缀命名
     """
 
-    VERIFY_GRANT_TOKEN: str = 'verify:grant_token'  # 验证授权令牌（用于标记用户登录登出）
+    VERIFY_GRANT_TOKEN: str = 'verify:grant_token'  # 验证授权令牌（旧版吊销标记，启动时迁移到 REVOKED_TOKEN_JTI）
+    REVOKED_TOKEN_JTI: str = 'verify:revoked_jti'  # 已吊销令牌的 jti（有序集合，分值为令牌过期时间）
+    TOKEN_GENERATION: str = 'verify:token_generation'  # 用户令牌代数（哈希，user_id -> gen）
+    REFRESH_TOKEN: str = 'verify:refresh_token'  # 有效的刷新令牌（以令牌摘要为键）
+    REFRESH_TOKEN_USED: str = 'verify:refresh_token_used'  # 已轮换的刷新令牌（用于重复使用检测）
+    REFRESH_TOKEN_FAMILY: str = 'verify:refresh_token_family'  # 刷新令牌家族（删除即吊销整个家族）
     VERIFY_RANDOM_CODE: str = 'verify:random_code'  # 验证码随机码（用于校验验证码）
     IP_BLACK_LIST: str = 'ip:black_list'  # ip黑名单
+    LOGIN_FAILURES: str = 'login:failures'  # 登录失败记录（有序集合，按用户名/IP 区分）
+    LOGIN_LOCKOUT: str = 'login:lockout'  # 登录锁定标记（按用户名/IP 区分）
+    JOB_CURSOR: str = 'job:cursor'  # 分批维护任务的断点游标（哈希，任务名 -> 游标）
+    PASSWORD_HASH_ROUNDS: str = 'password:hash_rounds'  # 各主机校准出的 bcrypt 成本因子（同一主机的 worker 共用）
+
+    CHANNEL_TOKEN_REVOKED: str = 'channel:token_revoked'  # 令牌吊销广播频道
+    CHANNEL_USER_CHANGED: str = 'channel:user_changed'  # 用户数据变更广播频道
+    CHANNEL_TOKEN_GENERATION: str = 'channel:token_generation'  # 用户令牌代数变更广播频道
 
     model_config = SettingsConfigDict(
         env_file='.env',
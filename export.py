@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+
+from app.providers import database_provider, logging_provider
+from app.services.auth import user_export_service
+from config.database import settings as db_settings
+
+logging_provider.register()
+
+
+async def export(args: argparse.Namespace):
+    try:
+        with open(args.output, 'wb') as output:
+            async for chunk in user_export_service.export_users(args.format, args.time_zone, args.batch_size):
+                output.write(chunk)
+    finally:
+        for _, engine in database_provider.chain_engines():
+            await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='离线导出用户数据')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv', help='导出格式')
+    parser.add_argument('output', help='输出文件路径（日志会输出到标准输出，因此不支持输出到标准输出）')
+    parser.add_argument('--time-zone', default=db_settings.POSTGRES_TIME_ZONE, help='时间字段使用的时区')
+    parser.add_argument(
+        '--batch-size', type=int, default=db_settings.POSTGRES_STREAM_BATCH_SIZE, help='每批读取的行数'
+    )
+    asyncio.run(export(parser.parse_args()))
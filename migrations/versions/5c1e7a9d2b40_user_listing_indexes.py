@@ -0,0 +1,45 @@
+"""user listing indexes
+
+Revision ID: 5c1e7a9d2b40
+Revises: 883992f5b42f
+Create Date: 2026-10-17 10:12:41.204518
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2b40'
+down_revision: Union[str, None] = '883992f5b42f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 并发建索引不能在事务中执行，避免锁表
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], postgresql_concurrently=True)
+        op.create_index(
+            'ix_users_state_created_at_id', 'users', ['state', 'created_at', 'id'], postgresql_concurrently=True
+        )
+        for column in ('username', 'nickname', 'cellphone'):
+            op.create_index(
+                f'ix_users_{column}_trgm',
+                'users',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in ('cellphone', 'nickname', 'username'):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_state_created_at_id', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""live row user indexes
+
+Revision ID: 9f3b6d21c8e7
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-17 11:02:15.873306
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3b6d21c8e7'
+down_revision: Union[str, None] = '5c1e7a9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 并发建索引不能在事务中执行，避免锁表
+    with op.get_context().autocommit_block():
+        for column in ('username', 'cellphone'):
+            op.create_index(
+                f'uq_users_{column}_live',
+                'users',
+                [column],
+                unique=True,
+                postgresql_where=sa.text('deleted_at IS NULL'),
+                postgresql_concurrently=True,
+            )
+            op.create_index(f'ix_users_{column}', 'users', [column], postgresql_concurrently=True)
+
+    # 唯一性改由只覆盖未删除记录的部分唯一索引保证，已删除用户的用户名、手机号可以重新注册
+    op.drop_constraint('users_username_key', 'users', type_='unique')
+    op.drop_constraint('users_cellphone_key', 'users', type_='unique')
+
+
+def downgrade() -> None:
+    # 如果已删除的记录与现有记录重复，需先处理重复数据
+    op.create_unique_constraint('users_cellphone_key', 'users', ['cellphone'])
+    op.create_unique_constraint('users_username_key', 'users', ['username'])
+
+    with op.get_context().autocommit_block():
+        for column in ('cellphone', 'username'):
+            op.drop_index(f'ix_users_{column}', table_name='users', postgresql_concurrently=True)
+            op.drop_index(f'uq_users_{column}_live', table_name='users', postgresql_concurrently=True)
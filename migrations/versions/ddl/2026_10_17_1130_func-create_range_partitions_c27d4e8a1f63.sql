@@ -0,0 +1,33 @@
+-- 函数
+-- 为范围分区表创建当前及未来的分区（已存在的分区会跳过）
+-- 参数：父表名，分区跨度（day/week/month/year），预先创建的未来分区数
+-- 分区以 UTC 时间对齐，子表命名为 {父表名}_p{起始日期}
+-- 示例：SELECT create_range_partitions('events', 'month', 3);
+CREATE OR REPLACE FUNCTION create_range_partitions(parent_table text, part_interval text, premake integer)
+RETURNS integer AS $$
+DECLARE
+    step interval := ('1 ' || part_interval)::interval;
+    part_start timestamp := date_trunc(part_interval, now() AT TIME ZONE 'UTC');
+    part_name text;
+    created integer := 0;
+BEGIN
+    FOR i IN 0..premake LOOP
+        part_name := format('%s_p%s', parent_table, to_char(part_start, 'YYYYMMDD'));
+
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                part_name,
+                parent_table,
+                part_start AT TIME ZONE 'UTC',
+                (part_start + step) AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+
+        part_start := part_start + step;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
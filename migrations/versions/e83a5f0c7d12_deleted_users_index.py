@@ -0,0 +1,36 @@
+"""deleted users index
+
+Revision ID: e83a5f0c7d12
+Revises: c27d4e8a1f63
+Create Date: 2026-10-17 12:05:09.331870
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83a5f0c7d12'
+down_revision: Union[str, None] = 'c27d4e8a1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 并发建索引不能在事务中执行，避免锁表
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_deleted_at_id',
+            'users',
+            ['deleted_at', 'id'],
+            postgresql_where=sa.text('deleted_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_deleted_at_id', table_name='users', postgresql_concurrently=True)
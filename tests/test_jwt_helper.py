@@ -0,0 +1,154 @@
+#
+# JWT 引擎一致性测试
+#
+# 验证 jose、native（hmac）与非对称引擎签发的令牌可以互相验证，且对 iss、aud、exp、nbf 的校验结果一致。
+#
+
+import time
+import uuid
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.support.jwt_helper import AsymmetricEngine, HmacEngine, JoseEngine
+
+KEY = 'test-secret'
+ISSUER = 'fastapi'
+AUDIENCE = 'fastapi'
+
+
+def _claims(**overrides) -> dict:
+    now = int(time.time())
+    claims = {
+        'iss': ISSUER,
+        'aud': AUDIENCE,
+        'sub': str(uuid.uuid4()),
+        'exp': now + 60,
+        'nbf': now,
+        'iat': now,
+        'jti': str(uuid.uuid4()),
+    }
+    claims.update(overrides)
+    return {name: value for name, value in claims.items() if value is not None}
+
+
+def _hmac_engines(algorithm: str) -> list:
+    return [
+        JoseEngine(KEY, algorithm, ISSUER, AUDIENCE),
+        HmacEngine(KEY, algorithm, ISSUER, AUDIENCE),
+    ]
+
+
+def _private_key(algorithm: str):
+    if algorithm == 'RS256':
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == 'ES256':
+        return ec.generate_private_key(ec.SECP256R1())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+@pytest.mark.parametrize('algorithm', ['HS256', 'HS384', 'HS512'])
+def test_hmac_engine_encodes_identical_tokens(algorithm):
+    claims = _claims()
+    jose_engine, hmac_engine = _hmac_engines(algorithm)
+
+    assert hmac_engine.encode(claims) == jose_engine.encode(claims)
+
+
+@pytest.mark.parametrize('algorithm', ['HS256', 'HS384', 'HS512'])
+def test_hmac_tokens_are_interchangeable(algorithm):
+    claims = _claims()
+    engines = _hmac_engines(algorithm)
+
+    for issuing_engine in engines:
+        token = issuing_engine.encode(claims)
+        for verifying_engine in engines:
+            assert verifying_engine.decode(token) == claims
+
+
+def test_hmac_engine_rejects_other_algorithm():
+    token = JoseEngine(KEY, 'HS512', ISSUER, AUDIENCE).encode(_claims())
+
+    with pytest.raises(JWTError):
+        HmacEngine(KEY, 'HS256', ISSUER, AUDIENCE).decode(token)
+
+
+def test_hmac_engine_rejects_tampered_signature():
+    token = HmacEngine(KEY, 'HS256', ISSUER, AUDIENCE).encode(_claims())
+    tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+
+    for engine in _hmac_engines('HS256'):
+        with pytest.raises(JWTError):
+            engine.decode(tampered)
+
+
+@pytest.mark.parametrize('algorithm', ['RS256', 'ES256'])
+def test_asymmetric_tokens_verify_with_jose(algorithm):
+    private_key = _private_key(algorithm)
+    engine = AsymmetricEngine({'k1': private_key}, algorithm, 'k1', ISSUER, AUDIENCE)
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    claims = _claims()
+
+    token = engine.encode(claims)
+    assert jwt.decode(token, public_pem, algorithms=algorithm, issuer=ISSUER, audience=AUDIENCE) == claims
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    token = jwt.encode(claims, private_pem, algorithm=algorithm, headers={'kid': 'k1'})
+    assert engine.decode(token) == claims
+
+
+@pytest.mark.parametrize('algorithm', ['RS256', 'ES256', 'EdDSA'])
+def test_asymmetric_engine_verifies_rotated_keys(algorithm):
+    old_key, new_key = _private_key(algorithm), _private_key(algorithm)
+    old_engine = AsymmetricEngine({'k1': old_key}, algorithm, 'k1', ISSUER, AUDIENCE)
+    engine = AsymmetricEngine({'k1': old_key.public_key(), 'k2': new_key}, algorithm, 'k2', ISSUER, AUDIENCE)
+    claims = _claims()
+
+    assert engine.decode(engine.encode(claims)) == claims
+    assert engine.decode(old_engine.encode(claims)) == claims
+    with pytest.raises(JWTError):
+        old_engine.decode(engine.encode(claims))
+
+
+def _all_engines() -> list:
+    return [
+        *_hmac_engines('HS256'),
+        AsymmetricEngine({'k1': _private_key('ES256')}, 'ES256', 'k1', ISSUER, AUDIENCE),
+    ]
+
+
+@pytest.mark.parametrize(
+    'overrides, error',
+    [
+        ({'iss': None}, JWTClaimsError),
+        ({'iss': 'other'}, JWTClaimsError),
+        ({'aud': None}, JWTError),
+        ({'aud': 'other'}, JWTClaimsError),
+        ({'aud': ['other', 'another']}, JWTClaimsError),
+        ({'exp': int(time.time()) - 10}, ExpiredSignatureError),
+        ({'nbf': int(time.time()) + 60}, JWTClaimsError),
+        ({'sub': 123}, JWTClaimsError),
+    ],
+    ids=['missing-iss', 'wrong-iss', 'missing-aud', 'wrong-aud', 'wrong-aud-list', 'expired', 'not-yet-valid', 'sub'],
+)
+def test_engines_reject_invalid_claims(overrides, error):
+    claims = _claims(**overrides)
+
+    for engine in _all_engines():
+        token = engine.encode(claims)
+        with pytest.raises(error):
+            engine.decode(token)
+
+
+def test_engines_accept_audience_list():
+    claims = _claims(aud=['other', AUDIENCE])
+
+    for engine in _all_engines():
+        assert engine.decode(engine.encode(claims)) == claims
@@ -0,0 +1,128 @@
+#
+# SQL 执行统计与查询预算测试
+#
+# 使用内存 SQLite 引擎执行语句，由 sqlalchemy_provider 注册的引擎事件记录到收集器中。
+#
+
+import logging
+
+import pytest
+import sqlalchemy as sa
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.http.middleware import query_stats
+from app.providers import sqlalchemy_provider  # noqa: F401  注册记录语句的引擎事件
+from app.support import query_stats_helper
+from app.support.query_stats_helper import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def engine():
+    engine = sa.create_engine('sqlite://')
+    yield engine
+    engine.dispose()
+
+
+def _run(engine: sa.Engine, *statements: str):
+    with engine.connect() as connection:
+        for statement in statements:
+            connection.execute(sa.text(statement))
+
+
+def test_collect_records_statements(engine):
+    with query_stats_helper.collect() as stats:
+        _run(engine, 'SELECT 1', 'SELECT 2', 'SELECT 3')
+
+    assert stats.count == 3
+    assert stats.total_ms >= 0
+    assert stats.repeated(3) == {'SELECT ?': stats.statements['SELECT ?']}
+    assert stats.statements['SELECT ?'].count == 3
+    assert stats.report().startswith('3 statement(s)')
+
+
+def test_nested_collect_counts_in_all_active_collectors(engine):
+    with query_stats_helper.collect() as outer:
+        _run(engine, 'SELECT 1')
+        with query_stats_helper.collect() as inner:
+            _run(engine, 'SELECT 2', 'SELECT 3')
+        _run(engine, 'SELECT 4')
+
+    assert inner.count == 2
+    assert outer.count == 4
+
+
+def test_statements_outside_collect_are_not_recorded(engine):
+    with query_stats_helper.collect() as stats:
+        pass
+    _run(engine, 'SELECT 1')
+
+    assert stats.count == 0
+
+
+def test_budget_raise_mode(engine):
+    with pytest.raises(QueryBudgetExceeded, match='3 statements \\(budget 2\\)'):
+        with query_budget(max_queries=2, mode='raise', name='test block'):
+            _run(engine, 'SELECT 1', 'SELECT 2', 'SELECT 3')
+
+
+def test_budget_warn_mode(engine, caplog):
+    with caplog.at_level(logging.WARNING):
+        with query_budget(max_queries=2, mode='warn') as stats:
+            _run(engine, 'SELECT 1', 'SELECT 2', 'SELECT 3')
+
+    assert stats.count == 3
+    assert 'Query budget exceeded in code block' in caplog.text
+
+
+def test_budget_within_limit_and_off_mode(engine, caplog):
+    with caplog.at_level(logging.WARNING):
+        with query_budget(max_queries=2, mode='raise'):
+            _run(engine, 'SELECT 1', 'SELECT 2')
+        with query_budget(max_queries=0, mode='off'):
+            _run(engine, 'SELECT 1')
+
+    assert 'Query budget exceeded' not in caplog.text
+
+
+def test_budget_does_not_mask_errors(engine):
+    with pytest.raises(ValueError):
+        with query_budget(max_queries=0, mode='raise'):
+            _run(engine, 'SELECT 1')
+            raise ValueError()
+
+
+def _create_app(engine: sa.Engine, mode: str) -> FastAPI:
+    app = FastAPI()
+    query_stats.register(app)
+
+    @app.get('/items/{item_id}')
+    @query_budget(max_queries=2, mode=mode)
+    def get_item(item_id: int, statements: int = 1):
+        _run(engine, *(f'SELECT {item_id}' for _ in range(statements)))
+        return {'id': item_id}
+
+    @app.get('/unbudgeted')
+    def unbudgeted():
+        _run(engine, 'SELECT 1', 'SELECT 2', 'SELECT 3')
+        return {}
+
+    return app
+
+
+def test_middleware_checks_decorated_route(engine):
+    client = TestClient(_create_app(engine, 'raise'))
+
+    assert client.get('/items/1', params={'statements': 2}).json() == {'id': 1}
+    with pytest.raises(QueryBudgetExceeded, match='GET /items/\\{item_id\\}'):
+        client.get('/items/1', params={'statements': 3})
+    assert client.get('/unbudgeted').status_code == 200
+
+
+def test_middleware_warns_for_decorated_route(engine, caplog):
+    client = TestClient(_create_app(engine, 'warn'))
+
+    with caplog.at_level(logging.WARNING):
+        assert client.get('/items/1', params={'statements': 3}).status_code == 200
+
+    assert 'Query budget exceeded in GET /items/{item_id}: 3 statements (budget 2)' in caplog.text
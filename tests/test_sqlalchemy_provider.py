@@ -0,0 +1,62 @@
+#
+# SQL 语句规范化测试
+#
+
+import pytest
+
+from app.providers.sqlalchemy_provider import _bind_shape, normalize_statement
+
+
+@pytest.mark.parametrize(
+    'statement, expected',
+    [
+        # 占位符：asyncpg 的 $n 与 psycopg 的 %(name)s
+        ('SELECT * FROM users WHERE id = $1 AND state = $2', 'SELECT * FROM users WHERE id = ? AND state = ?'),
+        (
+            'SELECT * FROM users WHERE id = %(id_1)s AND state = %(state_1)s',
+            'SELECT * FROM users WHERE id = ? AND state = ?',
+        ),
+        # 字面量：负数、小数、字符串（含转义的单引号）
+        (
+            'SELECT * FROM t WHERE a = -5 AND b = 3.14 AND c = -0.5 AND d = 10',
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c = ? AND d = ?',
+        ),
+        ("SELECT * FROM t WHERE name = 'O''Brien' AND x = 'a'", 'SELECT * FROM t WHERE name = ? AND x = ?'),
+        ('SELECT * FROM t WHERE a = $1 - 1', 'SELECT * FROM t WHERE a = ? - ?'),
+        # IN 列表合并（长度不同的列表归为一类）
+        ('SELECT * FROM t WHERE id IN ($1, $2, $3)', 'SELECT * FROM t WHERE id IN (?, ...)'),
+        ('SELECT * FROM t WHERE id IN ($1::UUID, $2::UUID)', 'SELECT * FROM t WHERE id IN (?, ...)'),
+        ('SELECT * FROM t WHERE id IN (1, 2, 3)', 'SELECT * FROM t WHERE id IN (?, ...)'),
+        ('SELECT * FROM t WHERE id IN ($1)', 'SELECT * FROM t WHERE id IN (?)'),
+        # 多行 VALUES 合并
+        ('INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)', 'INSERT INTO t (a, b) VALUES (?, ...), ...'),
+        (
+            'INSERT INTO t (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)',
+            'INSERT INTO t (a, b) VALUES (?, ...), ...',
+        ),
+        # 以数字结尾的标识符与类型转换保持不变
+        (
+            'SELECT users_1.col2 FROM users AS users_1 JOIN ix_v2 ON users_1.id = ix_v2.id LIMIT $1',
+            'SELECT users_1.col2 FROM users AS users_1 JOIN ix_v2 ON users_1.id = ix_v2.id LIMIT ?',
+        ),
+        ('SELECT created_at::date, x::int4 FROM t', 'SELECT created_at::date, x::int4 FROM t'),
+        # 空白
+        ('SELECT  *\n  FROM   t\n WHERE a = 1', 'SELECT * FROM t WHERE a = ?'),
+    ],
+)
+def test_normalize_statement(statement, expected):
+    assert normalize_statement(statement) == expected
+
+
+@pytest.mark.parametrize(
+    'parameters, executemany, expected',
+    [
+        ({'id': 1, 'name': 'secret'}, False, '{id: int, name: str}'),
+        ((1, None, 'secret'), False, '(int, NoneType, str)'),
+        ([{'id': 1}, {'id': 2}, {'id': 3}], True, '3 x {id: int}'),
+        ([], True, '[]'),
+        (None, False, 'NoneType'),
+    ],
+)
+def test_bind_shape(parameters, executemany, expected):
+    assert _bind_shape(parameters, executemany) == expected